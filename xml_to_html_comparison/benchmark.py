@@ -0,0 +1,224 @@
+"""
+Benchmark of the validation pipeline on a synthetic corpus.
+
+Times every stage of `validate_content` separately per document type and
+writes the results to a JSON file. Pass a previous result file with
+--compare to flag stages that got slower.
+
+Usage:
+    python benchmark.py [--docs N] [--scale F] [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import datetime
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from config import DEFAULT_LOSS_THRESHOLD, TYPE_CONFIG
+from synthetic import generate_corpus
+from validation import (calculate_loss, clean_html_content, clean_xml_content,
+                        get_tokens)
+
+STAGES = ["xml_clean", "html_clean", "tokenize", "calculate_loss"]
+DEFAULT_TOLERANCE = 0.10
+# Stages faster than this per document are too noisy to compare.
+MIN_COMPARABLE_SECONDS = 50e-6
+
+
+def git_revision():
+    """Returns the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_document(oracle_xml, pg_html, config):
+    """Runs the validation stages of one document, returning seconds per stage."""
+    timings = {}
+
+    start = time.perf_counter()
+    xml_text = clean_xml_content(oracle_xml, config.get("ignore_tags", []))
+    timings["xml_clean"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    html_text = clean_html_content(pg_html)
+    timings["html_clean"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    oracle_tokens = get_tokens(xml_text)
+    postgres_tokens = get_tokens(html_text)
+    timings["tokenize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    calculate_loss(
+        oracle_tokens,
+        postgres_tokens,
+        config.get("loss_threshold", DEFAULT_LOSS_THRESHOLD),
+    )
+    timings["calculate_loss"] = time.perf_counter() - start
+
+    return timings
+
+
+def run_benchmark(corpus, rounds):
+    """
+    Times every document `rounds` times and keeps the fastest round per stage,
+    which filters out most scheduler noise.
+
+    Returns:
+        dict: doc_type -> {"docs", "chars", stage: total seconds, ...}
+    """
+    results = defaultdict(lambda: defaultdict(float))
+    for _, doc_type, oracle_xml, pg_html in corpus:
+        config = TYPE_CONFIG[doc_type]
+        best = {}
+        for _ in range(rounds):
+            for stage, seconds in time_document(oracle_xml, pg_html, config).items():
+                best[stage] = min(seconds, best.get(stage, seconds))
+
+        type_result = results[str(doc_type)]
+        type_result["docs"] += 1
+        type_result["chars"] += len(oracle_xml) + len(pg_html)
+        for stage, seconds in best.items():
+            type_result[stage] += seconds
+
+    for values in results.values():
+        values["docs"] = int(values["docs"])
+        values["chars"] = int(values["chars"])
+    return {doc_type: dict(values) for doc_type, values in results.items()}
+
+
+def summarize(results):
+    """Adds the per-stage totals over all document types."""
+    total = defaultdict(float)
+    for values in results.values():
+        for key, value in values.items():
+            total[key] += value
+    return dict(total)
+
+
+def compare_results(current, baseline, tolerance):
+    """
+    Prints the per-stage change against a baseline result file.
+
+    Returns:
+        list: (doc_type, stage, ratio) of the stages slower than `tolerance`.
+    """
+    regressions = []
+    print(f"\n{'type':<8}{'stage':<16}{'baseline':>12}{'current':>12}{'change':>9}")
+    for doc_type, values in current["results"].items():
+        base_values = baseline["results"].get(doc_type)
+        if not base_values:
+            continue
+
+        for stage in STAGES:
+            # Per document, so runs with a different --docs still line up
+            base = base_values[stage] / base_values["docs"]
+            now = values[stage] / values["docs"]
+            if base < MIN_COMPARABLE_SECONDS:
+                continue
+
+            ratio = now / base
+            marker = ""
+            if ratio > 1 + tolerance:
+                marker = "  REGRESSION"
+                regressions.append((doc_type, stage, ratio))
+            print(
+                f"{doc_type:<8}{stage:<16}{base * 1000:>10.2f}ms{now * 1000:>10.2f}ms"
+                f"{ratio - 1:>+8.0%}{marker}"
+            )
+    return regressions
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the validation stages.")
+    parser.add_argument(
+        "--docs", type=int, default=20, help="Documents per type (default: 20)."
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Document size factor (default: 1)."
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=3, help="Timing rounds per document (default: 3)."
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Corpus seed (default: 0)."
+    )
+    parser.add_argument(
+        "--types", type=str, help="Comma separated list of document types."
+    )
+    parser.add_argument(
+        "--output", type=str, default="benchmark_results.json", help="Result file."
+    )
+    parser.add_argument("--compare", type=str, help="Baseline result file.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Allowed slowdown per stage before failing (default: {DEFAULT_TOLERANCE}).",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.getLogger("validator").setLevel(logging.ERROR)
+
+    doc_types = None
+    if args.types:
+        doc_types = [int(t.strip()) for t in args.types.split(",")]
+
+    print("Generating synthetic corpus...")
+    corpus = list(
+        generate_corpus(args.docs, args.seed, args.scale, doc_types=doc_types)
+    )
+
+    print(f"Timing {len(corpus)} documents...")
+    results = run_benchmark(corpus, args.rounds)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "docs_per_type": args.docs,
+            "scale": args.scale,
+            "rounds": args.rounds,
+            "seed": args.seed,
+        },
+        "results": results,
+        "total": summarize(results),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'type':<8}{'docs':>6}" + "".join(f"{stage:>16}" for stage in STAGES))
+    for doc_type, values in list(results.items()) + [("total", report["total"])]:
+        print(
+            f"{doc_type:<8}{int(values['docs']):>6}"
+            + "".join(f"{values[stage] * 1000:>14.1f}ms" for stage in STAGES)
+        )
+    print(f"\nResults written to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than the baseline.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Benchmark of the Oracle fetch settings.
+
+Fetches documents with every combination of batch size, arraysize,
+prefetchrows and LOB mode, reading each CLOB like the validator does, and
+reports rows per second. By default it runs against `SimulatedOracleCursor`,
+a local stand-in that charges a network round-trip per fetch and per LOB
+read, so it only shows what its latency model predicts. With --env it runs
+the real "ALL" query (first --rows rows) instead, and with --standin the
+same query on an SQLite stand-in (see fixtures.py), which measures the
+query and CLOB reads without the tunnel; SQLite has no arraysize,
+prefetchrows or LOB mode, so only the batch sizes are compared there.
+
+Usage:
+    python benchmark_fetch.py [--rows N] [--latency MS] [--batch-sizes 100,500]
+                              [--arraysizes 100,500] [--prefetchrows 2,100]
+                              [--env DEV | --standin FIXTURE_FILE]
+"""
+
+import argparse
+import itertools
+import logging
+import time
+from types import SimpleNamespace
+
+from config import (ENV_CONFIG, ORACLE_ARRAYSIZE, ORACLE_BATCH_SIZE,
+                    ORACLE_PREFETCHROWS)
+from queries import build_oracle_query, configure_oracle_cursor
+from sources import SqliteSource
+from synthetic import generate_corpus
+
+DEFAULT_LATENCY_MS = 1.0
+DEFAULT_BANDWIDTH = 50e6  # bytes per second through the tunnel
+
+
+class SimulatedLob:
+    """LOB locator stand-in: every read is a round-trip."""
+
+    def __init__(self, text, cursor):
+        self.text = text
+        self.cursor = cursor
+
+    def size(self):
+        return len(self.text)
+
+    def read(self, offset=1, amount=None):
+        end = None if amount is None else offset - 1 + amount
+        chunk = self.text[offset - 1 : end]
+        self.cursor.round_trip(len(chunk))
+        return chunk
+
+
+class SimulatedOracleCursor:
+    """
+    Local stand-in for an oracledb cursor over (DOK_ID, DOKUMENT_TYP, CONTENT,
+    NAMN) rows. Round-trips sleep for `latency` seconds plus the transfer
+    time of their payload, which is what the fetch settings trade off.
+    """
+
+    def __init__(self, rows, latency, bandwidth=DEFAULT_BANDWIDTH):
+        self.rows = rows
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.arraysize = ORACLE_ARRAYSIZE
+        self.prefetchrows = ORACLE_PREFETCHROWS
+        self.outputtypehandler = None
+        self.round_trips = 0
+
+    def round_trip(self, payload_bytes):
+        self.round_trips += 1
+        time.sleep(self.latency + payload_bytes / self.bandwidth)
+
+    def var(self, type_code, arraysize=None):
+        return type_code
+
+    def _transfer(self, count):
+        rows = self.rows[self.position : self.position + count]
+        self.position += len(rows)
+        payload = 0
+        for doc_id, doc_type, content, name in rows:
+            payload += len(doc_id) + len(name) + 8
+            if self.lobs_as_str:
+                payload += len(content)
+            else:
+                content = SimulatedLob(content, self)
+            self.buffer.append((doc_id, doc_type, content, name))
+        self.round_trip(payload)
+
+    def execute(self, sql):
+        self.position = 0
+        self.buffer = []
+        # `configure_oracle_cursor` only sets a handler for inline CLOBs
+        self.lobs_as_str = self.outputtypehandler is not None
+        self._transfer(self.prefetchrows)
+
+    def fetchmany(self, size):
+        while len(self.buffer) < size and self.position < len(self.rows):
+            self._transfer(self.arraysize)
+        batch, self.buffer = self.buffer[:size], self.buffer[size:]
+        return batch
+
+
+def read_all(cursor, batch_size):
+    """
+    Fetches every row of an executed cursor and reads its CLOB.
+
+    Returns:
+        tuple: (rows, content chars)
+    """
+    rows = chars = 0
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return rows, chars
+        for row in batch:
+            content = row[2].read() if hasattr(row[2], "read") else row[2]
+            rows += 1
+            chars += len(content or "")
+
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(",")]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the Oracle fetch settings.")
+    parser.add_argument(
+        "--rows", type=int, default=1000, help="Documents to fetch (default: 1000)."
+    )
+    parser.add_argument(
+        "--scale", type=float, default=0.1, help="Document size factor (default: 0.1)."
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=DEFAULT_LATENCY_MS,
+        help=f"Simulated round-trip time in ms (default: {DEFAULT_LATENCY_MS}).",
+    )
+    parser.add_argument(
+        "--batch-sizes", type=parse_int_list, default=[ORACLE_BATCH_SIZE, 500]
+    )
+    parser.add_argument(
+        "--arraysizes", type=parse_int_list, default=[ORACLE_ARRAYSIZE, 500]
+    )
+    parser.add_argument(
+        "--prefetchrows", type=parse_int_list, default=[ORACLE_PREFETCHROWS, 100]
+    )
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument(
+        "--env",
+        type=str.upper,
+        choices=ENV_CONFIG.keys(),
+        help="Measure the real Oracle database of this environment instead.",
+    )
+    target.add_argument(
+        "--standin",
+        metavar="FIXTURE_FILE",
+        help="Measure the SQLite stand-in written by fixtures.py instead.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.getLogger("validator").setLevel(logging.ERROR)
+
+    query_args = SimpleNamespace(
+        doc_id=None, types=None, shard=None, sample=None, sample_rate=None
+    )
+    settings = itertools.product(
+        args.batch_sizes, args.arraysizes, args.prefetchrows, [False, True]
+    )
+    if args.env:
+        import oracledb  # Not at module level, so the simulation needs no driver
+
+        ora_conf = ENV_CONFIG[args.env]["ORA"]
+        ora_conn = oracledb.connect(
+            user=ora_conf["USER"], password=ora_conf["PASS"], dsn=ora_conf["DSN"]
+        )
+        query, _ = build_oracle_query(query_args, args.env)
+        query = f"{query} FETCH FIRST {args.rows} ROWS ONLY"
+        print(f"Fetching {args.rows} documents from {args.env}...")
+    elif args.standin:
+        source = SqliteSource(args.standin)
+        query, _ = build_oracle_query(query_args, "DEV")
+        query = f"{query} LIMIT {args.rows}"
+        settings = [(batch_size, None, None, None) for batch_size in args.batch_sizes]
+        print(f"Fetching {args.rows} documents from the stand-in {args.standin}...")
+    else:
+        docs_per_type = max(1, args.rows // 8)
+        corpus = generate_corpus(docs_per_type, scale=args.scale)
+        rows = [
+            (doc_id, doc_type, xml, f"Dokument {doc_id}")
+            for doc_id, doc_type, xml, _ in corpus
+        ]
+        query = None
+        print(
+            f"Fetching {len(rows)} synthetic documents, "
+            f"{args.latency:g} ms simulated round-trip..."
+        )
+
+    print(
+        f"\n{'batch':>7}{'arraysize':>11}{'prefetch':>10}{'lobs':>6}"
+        f"{'rows/s':>10}{'MB/s':>8}"
+    )
+    for batch_size, arraysize, prefetchrows, lobs_as_str in settings:
+        started = time.perf_counter()
+        if args.standin:
+            cursor = source.execute(query)
+        else:
+            if args.env:
+                cursor = ora_conn.cursor()
+            else:
+                cursor = SimulatedOracleCursor(rows, args.latency / 1000)
+            configure_oracle_cursor(cursor, arraysize, prefetchrows, lobs_as_str)
+            cursor.execute(query)
+        fetched, chars = read_all(cursor, batch_size)
+        elapsed = time.perf_counter() - started
+        if args.env:
+            cursor.close()
+
+        lob_mode = "-" if lobs_as_str is None else "str" if lobs_as_str else "lob"
+        print(
+            f"{batch_size:>7}{arraysize or '-':>11}{prefetchrows or '-':>10}"
+            f"{lob_mode:>6}"
+            f"{fetched / elapsed:>10.0f}{chars / elapsed / 1e6:>8.1f}"
+        )
+
+    if args.env:
+        ora_conn.close()
+    if args.standin:
+        source.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+End-to-end throughput benchmark of the validation loop on an SQLite stand-in
+(see fixtures.py): Oracle query, Postgres lookups, validation and CSV
+writing, without the tunnels. Pass a previous result file with --compare to
+fail when throughput dropped.
+
+Usage:
+    python benchmark_loop.py FIXTURE_FILE [--workers N] [--pipeline]
+                             [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from types import SimpleNamespace
+
+from benchmark import DEFAULT_TOLERANCE, git_revision
+from config import ORACLE_BATCH_SIZE
+from main import run_validation_loop
+from queries import build_oracle_query
+from results import CsvResultWriter
+from sources import SqliteContentStore, SqliteSource
+
+
+def run_loop(path, workers, pipeline, batch_size, types=None):
+    """Runs the "ALL" (or --types) query on the stand-in, discarding the report."""
+    query_args = SimpleNamespace(
+        doc_id=None, types=types, shard=None, sample=None, sample_rate=None
+    )
+    query, _ = build_oracle_query(query_args, "DEV")
+
+    with SqliteSource(path) as source, SqliteContentStore(path) as store:
+        with open(os.devnull, "w", newline="", encoding="utf-8") as f:
+            started = time.perf_counter()
+            counter = run_validation_loop(
+                source.execute(query),
+                store,
+                CsvResultWriter(csv.writer(f)),
+                {"URL_BASE": "https://localhost"},
+                workers,
+                pipeline=pipeline,
+                batch_size=batch_size,
+            )
+            elapsed = time.perf_counter() - started
+    return counter, elapsed
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the validation loop.")
+    parser.add_argument("fixture", help="Stand-in file written by fixtures.py.")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Validation processes (default: 1)."
+    )
+    parser.add_argument("--pipeline", action="store_true", help="Run with --pipeline.")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=ORACLE_BATCH_SIZE,
+        help=f"Oracle rows per batch (default: {ORACLE_BATCH_SIZE}).",
+    )
+    parser.add_argument(
+        "--types", type=str, help="Comma separated list of document types."
+    )
+    parser.add_argument(
+        "--output", type=str, default="benchmark_loop.json", help="Result file."
+    )
+    parser.add_argument("--compare", type=str, help="Baseline result file.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Allowed throughput drop before failing (default: {DEFAULT_TOLERANCE}).",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.getLogger("validator").setLevel(logging.ERROR)
+
+    print(f"Running the validation loop on {args.fixture}...")
+    counter, elapsed = run_loop(
+        args.fixture, args.workers, args.pipeline, args.batch_size, args.types
+    )
+    docs = sum(counter.processed_by_type.values())
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "fixture": os.path.basename(args.fixture),
+            "workers": args.workers,
+            "pipeline": args.pipeline,
+            "batch_size": args.batch_size,
+            "types": args.types,
+        },
+        "docs": docs,
+        "seconds": elapsed,
+        "docs_per_sec": docs / elapsed,
+        "stats": counter.stats,
+        "timings": counter.timer.summary(),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"{docs} documents in {elapsed:.1f}s: {report['docs_per_sec']:.0f} docs/s "
+        f"(failures: {counter.stats['failures']})"
+    )
+    print(f"Results written to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["docs"] != docs:
+            print(f"Baseline ran {baseline['docs']} documents, not comparable.")
+            sys.exit(1)
+
+        ratio = report["docs_per_sec"] / baseline["docs_per_sec"]
+        print(f"Baseline: {baseline['docs_per_sec']:.0f} docs/s ({ratio - 1:+.0%})")
+        if ratio < 1 - args.tolerance:
+            print("Throughput dropped below the baseline.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Micro-benchmark of `validation.get_tokens` against the original multi-pass
+tokenizer, on the extracted text of the checked-in samples.
+
+Usage:
+    python benchmark_tokenizer.py [SAMPLE_DIR] [--repeat N]
+"""
+
+import argparse
+import glob
+import os
+import re
+import timeit
+import unicodedata
+
+from validation import clean_html_content, get_tokens
+
+DEFAULT_SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+
+
+def get_tokens_reference(text):
+    """The original tokenizer: NFKC, lower and three re.sub passes."""
+    if not text:
+        return set()
+
+    text = unicodedata.normalize("NFKC", text)
+    text = text.lower()
+    clean_text = re.sub(r"[^\w\s]", " ", text)
+    clean_text = re.sub(r"(\d)", r" \1 ", clean_text)
+    clean_text = re.sub(r"\s+", " ", clean_text)
+    return set(clean_text.split())
+
+
+def best_time(func, text, repeat):
+    """Best time of a single call (seconds) over `repeat` rounds."""
+    number = max(1, 20000 // max(1, len(text) // 100))
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark get_tokens.")
+    parser.add_argument("sample_dir", nargs="?", default=DEFAULT_SAMPLE_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = {}
+    for path in sorted(glob.glob(os.path.join(args.sample_dir, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            texts[os.path.basename(path)] = clean_html_content(f.read())
+    texts["all samples x20"] = " ".join(texts.values()) * 20
+
+    print(
+        f"{'sample':<24}{'chars':>9}{'reference':>13}{'get_tokens':>13}{'speedup':>9}"
+    )
+    for name, text in texts.items():
+        if get_tokens(text) != get_tokens_reference(text):
+            raise SystemExit(f"Token sets differ for {name}")
+
+        reference = best_time(get_tokens_reference, text, args.repeat)
+        current = best_time(get_tokens, text, args.repeat)
+        print(
+            f"{name:<24}{len(text):>9}{reference * 1e6:>11.1f}us"
+            f"{current * 1e6:>11.1f}us{reference / current:>8.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
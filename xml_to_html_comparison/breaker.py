@@ -0,0 +1,45 @@
+import logging
+
+logger = logging.getLogger("validator")
+
+
+class CircuitBreaker:
+    """
+    Stops validating a document type that fails systemically (e.g. a broken
+    Postgres migration of its table): once `min_docs` documents of the type
+    are validated and more than `failure_rate` of them failed, the rest of
+    the type is aborted. Disabled when `min_docs` is None.
+
+    The stages check `is_open` before reading CLOBs, looking up Postgres and
+    validating, so only documents already in flight (at most a batch per
+    stage) are still validated after the breaker opens.
+    """
+
+    def __init__(self, min_docs=None, failure_rate=1.0):
+        self.min_docs = min_docs
+        self.failure_rate = failure_rate
+        # doc_type -> (validated, failed) when it opened
+        self.tripped = {}
+
+    def is_open(self, doc_type):
+        return doc_type in self.tripped
+
+    def record(self, doc_type, counter):
+        """Checks a type against its DocCounter counts after each document."""
+        if self.min_docs is None or doc_type in self.tripped:
+            return
+        validated = counter.validated_by_type[doc_type]
+        failed = counter.failed_by_type[doc_type]
+        if validated >= self.min_docs and failed > self.failure_rate * validated:
+            self.tripped[doc_type] = (validated, failed)
+            logger.warning(
+                f"Aborting type {doc_type}: {failed}/{validated} validated "
+                f"documents failed ({failed / validated:.0%}), the rest is skipped."
+            )
+
+    def log_summary(self, counter):
+        for doc_type, (validated, failed) in sorted(self.tripped.items()):
+            logger.warning(
+                f"Type {doc_type} aborted after {failed}/{validated} failures: "
+                f"{counter.aborted_by_type[doc_type]} documents not validated."
+            )
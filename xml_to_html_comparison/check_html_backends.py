@@ -0,0 +1,60 @@
+"""
+Checks that every HTML text extraction backend produces the same token set
+as the BeautifulSoup reference backend on the checked-in sample corpus.
+
+Usage:
+    python check_html_backends.py [SAMPLE_DIR]
+"""
+
+import glob
+import os
+import sys
+
+from validation import HTML_BACKENDS, clean_html_content, get_tokens
+
+REFERENCE_BACKEND = "bs4"
+DEFAULT_SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+
+
+def compare_backends(html):
+    """Returns {backend: (only_in_reference, only_in_backend)} for differing backends."""
+    reference = get_tokens(clean_html_content(html, REFERENCE_BACKEND))
+    differences = {}
+    for backend in HTML_BACKENDS:
+        tokens = get_tokens(clean_html_content(html, backend))
+        if tokens != reference:
+            differences[backend] = (reference - tokens, tokens - reference)
+    return differences
+
+
+def main():
+    sample_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SAMPLE_DIR
+    paths = sorted(glob.glob(os.path.join(sample_dir, "*.html")))
+    if not paths:
+        print(f"No .html samples found in {sample_dir}")
+        sys.exit(1)
+
+    mismatches = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            differences = compare_backends(f.read())
+
+        name = os.path.basename(path)
+        if not differences:
+            print(f"OK       {name}")
+            continue
+
+        mismatches += 1
+        for backend, (missing, extra) in differences.items():
+            print(
+                f"MISMATCH {name} [{backend}] missing: {sorted(missing)} extra: {sorted(extra)}"
+            )
+
+    print(
+        f"{len(paths) - mismatches}/{len(paths)} samples equivalent to '{REFERENCE_BACKEND}'."
+    )
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
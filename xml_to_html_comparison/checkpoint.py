@@ -0,0 +1,69 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger("validator")
+
+DEFAULT_CHECKPOINT_INTERVAL = 1000
+
+
+def checkpoint_path_for(csv_path):
+    """Returns the checkpoint file that belongs to an output CSV."""
+    return f"{csv_path}.checkpoint.json"
+
+
+def load_checkpoint(path):
+    """Reads a checkpoint written by `Checkpointer`."""
+    if not os.path.exists(path):
+        raise ValueError(f"No checkpoint found at {path}")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def prepare_csv_for_resume(csv_path, offset):
+    """Drops any rows written after the checkpoint so they are not duplicated."""
+    with open(csv_path, "r+b") as f:
+        f.truncate(offset)
+
+
+class Checkpointer:
+    """
+    Periodically saves the resume point of a run: the last fully processed
+    DOK_ID, the DocCounter state and the CSV byte offset.
+
+    Only called at batch boundaries, after the batch's rows have been written,
+    so everything up to `last_doc_id` is guaranteed to be in the CSV.
+    """
+
+    def __init__(self, path, csv_file, csv_path, interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.path = path
+        self.csv_file = csv_file
+        self.csv_path = csv_path
+        self.interval = interval
+        self.saved_at = 0
+
+    def maybe_save(self, last_doc_id, counter):
+        """Saves a checkpoint once `interval` more documents have been handled."""
+        handled = sum(counter.processed_by_type.values())
+        if handled - self.saved_at >= self.interval:
+            self.save(last_doc_id, counter)
+            self.saved_at = handled
+
+    def save(self, last_doc_id, counter, complete=False):
+        self.csv_file.flush()
+        os.fsync(self.csv_file.fileno())
+
+        data = {
+            "last_doc_id": last_doc_id,
+            "csv_path": self.csv_path,
+            "csv_offset": self.csv_file.tell(),
+            "counter": counter.snapshot(),
+            "complete": complete,
+        }
+
+        # Write-then-rename so a crash never leaves a half written checkpoint.
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+        logger.debug(f"Checkpoint saved at Doc ID {last_doc_id}")
@@ -79,6 +79,49 @@ IGNORED_TYPES = {
 
 DEFAULT_LOSS_THRESHOLD = 0.00
 GLOBAL_IGNORE_TAGS = ["audittrail-list", "meta-data"]
+
+# Postgres HTML text extraction: "lxml" (fast) or "bs4" (BeautifulSoup reference)
+HTML_BACKEND = "lxml"
+# Parse Oracle XML incrementally instead of building the full tree
+XML_STREAMING = False
+# Compare tokens as sorted arrays of 64-bit hashes instead of string sets (numpy)
+TOKEN_HASHING = False
+# Characters per Oracle LOB read / streaming parser feed
+LOB_CHUNK_SIZE = 262144
+# Oracle fetch tuning: rows per batch, rows per round-trip, rows returned
+# with the execute, and whether CLOBs are fetched inline as str
+ORACLE_BATCH_SIZE = 100
+ORACLE_ARRAYSIZE = 100
+ORACLE_PREFETCHROWS = 2
+ORACLE_LOBS_AS_STR = False
+# Batches buffered between the pipeline stages (--pipeline)
+PIPELINE_QUEUE_SIZE = 4
+# Result rows per Parquet row group (--output-format parquet)
+PARQUET_ROW_GROUP_SIZE = 50000
+# Seconds between progress reports, and the window their docs/sec covers
+PROGRESS_INTERVAL = 30
+PROGRESS_WINDOW = 300
+# Last-modified column of T_DOKUMENT polled by --watch, seconds between polls,
+# and how old a change must be before it is picked up (commits in flight).
+# PLACEHOLDER: no query in this repo reads the column yet, confirm its name in
+# the FASSADMIN schema before using --watch.
+ORACLE_MODIFIED_COLUMN = "SENAST_ANDRAD"
+WATCH_POLL_INTERVAL = 60
+WATCH_LAG = 30
+# Circuit breaker (--abort-after): validated documents of a type before it
+# can be aborted, and the failure rate above which it is
+ABORT_MIN_DOCS = 200
+ABORT_FAILURE_RATE = 0.9
+# DOK_ID hash buckets --sample-rate picks from (resolution of the rate)
+SAMPLE_BUCKETS = 10000
+# Whether T_DOKUMENT.DOK_ID is a NUMBER (ORDER BY sorts numerically) or text;
+# merge and diff compare report doc_ids the same way
+DOK_ID_NUMERIC = True
+# Postgres connections shared by the content lookups
+PG_POOL_SIZE = 4
+# Tries per lookup before a dropped Postgres connection fails the run
+PG_RECONNECT_ATTEMPTS = 3
+
 ARTIKEL_TYPES = {7, 32}
 
 # Maps Oracle DOKUMENT_TYP -> Config Dict
@@ -0,0 +1,146 @@
+import sqlite3
+import zlib
+
+from config import TYPE_CONFIG
+
+
+def _pack(text):
+    return None if text is None else zlib.compress(text.encode("utf-8"))
+
+
+def _unpack(blob):
+    return None if blob is None else zlib.decompress(blob).decode("utf-8")
+
+
+class CorpusWriter:
+    """
+    Captures the content a run validated into a local corpus file: an SQLite
+    table keyed by DOK_ID with the Oracle XML and Postgres HTML zlib
+    compressed, so single documents can be read back without a full scan.
+
+    Documents missing in Postgres are stored without content, so a replay
+    reports them the same way.
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                doc_type INTEGER NOT NULL,
+                oracle_xml BLOB,
+                pg_html BLOB,
+                link_id TEXT
+            )
+            """
+        )
+
+    def store(self, doc_id, doc_type, oracle_xml, pg_html, link_id):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?)",
+            (
+                str(doc_id),
+                doc_type,
+                _pack(oracle_xml),
+                _pack(pg_html),
+                None if link_id is None else str(link_id),
+            ),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def _placeholders(values):
+    return ", ".join("?" * len(values))
+
+
+class CorpusCursor:
+    """Serves corpus documents like the Oracle cursor serves T_DOKUMENT rows."""
+
+    def __init__(self, path, types=None, doc_id=None):
+        # Read in the Oracle reader thread with --pipeline
+        conn = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        sql = "SELECT doc_id, doc_type, oracle_xml FROM documents"
+        params = []
+        if doc_id:
+            sql += " WHERE doc_id = ?"
+            params.append(str(doc_id))
+        elif types:
+            sql += f" WHERE doc_type IN ({_placeholders(types)})"
+            params.extend(types)
+        self.cursor = conn.execute(f"{sql} ORDER BY doc_id", params)
+
+    def fetchmany(self, size):
+        return [
+            (doc_id, doc_type, _unpack(oracle_xml), "")
+            for doc_id, doc_type, oracle_xml in self.cursor.fetchmany(size)
+        ]
+
+
+class CorpusReader:
+    """
+    Reads a corpus written by `CorpusWriter`. `cursor()` stands in for the
+    Oracle cursor and the reader itself for the `PostgresPool`, so a replay
+    runs the regular validation loop without any database.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Lookups run in the resolver thread with --pipeline
+        self.conn = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self.conn.execute("SELECT 1 FROM documents LIMIT 1")
+
+    def cursor(self, types=None, doc_id=None):
+        return CorpusCursor(self.path, types, doc_id)
+
+    def documents(self, types=None):
+        """Yields (doc_id, doc_type, oracle_xml, pg_html) of the documents with content."""
+        sql = (
+            "SELECT doc_id, doc_type, oracle_xml, pg_html FROM documents "
+            "WHERE oracle_xml IS NOT NULL AND pg_html IS NOT NULL"
+        )
+        params = list(types or [])
+        if types:
+            sql += f" AND doc_type IN ({_placeholders(types)})"
+        for doc_id, doc_type, oracle_xml, pg_html in self.conn.execute(
+            f"{sql} ORDER BY doc_id", params
+        ):
+            yield doc_id, doc_type, _unpack(oracle_xml), _unpack(pg_html)
+
+    def fetch_contents(self, doc_ids, config):
+        """Same contract as `PostgresPool.fetch_contents`."""
+        found = {}
+        types = [t for t, c in TYPE_CONFIG.items() if c["table"] == config["table"]]
+        for start in range(0, len(doc_ids), 500):
+            chunk = [str(doc_id) for doc_id in doc_ids[start : start + 500]]
+            rows = self.conn.execute(
+                "SELECT doc_id, pg_html, link_id FROM documents "
+                f"WHERE doc_id IN ({_placeholders(chunk)}) "
+                f"AND doc_type IN ({_placeholders(types)}) AND pg_html IS NOT NULL",
+                chunk + types,
+            )
+            for doc_id, pg_html, link_id in rows:
+                found[doc_id] = (_unpack(pg_html), link_id)
+        return found
+
+    def map(self, fn, items):
+        return map(fn, items)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
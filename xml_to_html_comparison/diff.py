@@ -0,0 +1,88 @@
+import logging
+from collections import Counter, defaultdict
+
+from merge import doc_id_key, ordered_rows
+
+logger = logging.getLogger("validator")
+
+DIFF_HEADER = [
+    "doc_id",
+    "doc_type",
+    "change",
+    "old_status",
+    "new_status",
+    "old_loss",
+    "new_loss",
+    "url",
+]
+CHANGES = ("NEW_FAILURE", "FIXED", "CHANGED")
+
+
+def parse_loss(value):
+    """Reads a report loss ("0,0523"), None for rows without one."""
+    return float(value.replace(",", ".")) if value else None
+
+
+def diff_rows(old_rows, new_rows, min_change=0.0):
+    """
+    Joins two DOK_ID ordered reports on doc_id (compared by `doc_id_key`),
+    holding one row of each.
+
+    Reports only list documents that did not pass, so a document only in the
+    new report is a new failure and one only in the old report is fixed.
+    Documents in both are changed when their status differs or their loss
+    moved by more than `min_change`.
+
+    Yields:
+        tuple: (change, old_row, new_row), either row None when missing.
+        Unchanged documents are yielded with change None.
+    """
+    old_row, new_row = next(old_rows, None), next(new_rows, None)
+    while old_row is not None or new_row is not None:
+        old_key = doc_id_key(old_row[0]) if old_row else None
+        new_key = doc_id_key(new_row[0]) if new_row else None
+        if new_row is None or (old_row is not None and old_key < new_key):
+            yield "FIXED", old_row, None
+            old_row = next(old_rows, None)
+        elif old_row is None or new_key < old_key:
+            yield "NEW_FAILURE", None, new_row
+            new_row = next(new_rows, None)
+        else:
+            old_loss, new_loss = parse_loss(old_row[4]), parse_loss(new_row[4])
+            changed = old_row[3] != new_row[3]
+            if old_loss is not None and new_loss is not None:
+                changed = changed or abs(new_loss - old_loss) > min_change
+            yield ("CHANGED" if changed else None), old_row, new_row
+            old_row, new_row = next(old_rows, None), next(new_rows, None)
+
+
+def diff_reports(old_path, new_path, csv_writer, min_change=0.0):
+    """
+    Streams the differences between two reports (CSV or Parquet) into
+    `csv_writer`, one row per new failure, fix or change.
+
+    Returns:
+        dict: doc_type -> Counter of NEW_FAILURE/FIXED/CHANGED/UNCHANGED.
+    """
+    csv_writer.writerow(DIFF_HEADER)
+    counts = defaultdict(Counter)
+    for change, old_row, new_row in diff_rows(
+        ordered_rows(old_path), ordered_rows(new_path), min_change
+    ):
+        row = new_row or old_row
+        counts[row[1]][change or "UNCHANGED"] += 1
+        if change is None:
+            continue
+        csv_writer.writerow(
+            [
+                row[0],
+                row[1],
+                change,
+                old_row[3] if old_row else "",
+                new_row[3] if new_row else "",
+                old_row[4] if old_row else "",
+                new_row[4] if new_row else "",
+                row[5],
+            ]
+        )
+    return counts
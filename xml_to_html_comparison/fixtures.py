@@ -0,0 +1,191 @@
+"""
+Fills an SQLite stand-in database (see sources.py) with synthetic documents.
+
+The file holds the Oracle tables T_DOKUMENT, T_DOKUMENT_ARTIKEL and
+T_DOKUMENT_PRODUKT and one table per TYPE_CONFIG Postgres table, so
+`python main.py --standin FILE` runs the whole loop without the tunnels.
+To reach a million documents quickly, a pool of --distinct document pairs
+(see `synthetic.generate_corpus`) is reused under new DOK_IDs.
+
+Usage:
+    python fixtures.py FILE [--docs N] [--distinct N] [--scale F]
+                            [--missing-rate F] [--loss-rate F] [--seed N]
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import time
+
+from config import (ARTIKEL_TYPES, IGNORED_TYPES, ORACLE_MODIFIED_COLUMN,
+                    TYPE_CONFIG)
+from synthetic import generate_corpus
+
+# Unconfigured types mixed in, so the excluded-types query has work to do.
+OTHER_TYPES = [min(IGNORED_TYPES), 999]
+INSERT_BATCH = 10000
+# Modification times are spread over the days before the fixtures are made
+MODIFIED_SPREAD_DAYS = 30
+
+
+def create_schema(conn):
+    conn.executescript(
+        f"""
+        CREATE TABLE T_DOKUMENT (
+            DOK_ID TEXT PRIMARY KEY,
+            DOKUMENT_TYP INTEGER NOT NULL,
+            CONTENT TEXT,
+            NAMN TEXT,
+            {ORACLE_MODIFIED_COLUMN} TEXT
+        );
+        CREATE TABLE T_DOKUMENT_ARTIKEL (DOK_ID TEXT NOT NULL);
+        CREATE TABLE T_DOKUMENT_PRODUKT (DOK_ID TEXT NOT NULL);
+        """
+    )
+    tables = {config["table"]: config for config in TYPE_CONFIG.values()}
+    for table, config in tables.items():
+        conn.execute(
+            f'CREATE TABLE "{table}" ({config["id_col"]} TEXT PRIMARY KEY, '
+            f'content TEXT, {config["link_col"]} TEXT)'
+        )
+
+
+def create_indexes(conn):
+    conn.execute("CREATE INDEX artikel_dok_id ON T_DOKUMENT_ARTIKEL (DOK_ID)")
+    conn.execute("CREATE INDEX produkt_dok_id ON T_DOKUMENT_PRODUKT (DOK_ID)")
+    conn.execute(
+        f"CREATE INDEX dokument_modified ON T_DOKUMENT ({ORACLE_MODIFIED_COLUMN})"
+    )
+
+
+def generate_fixtures(
+    path, docs, distinct=1000, scale=0.05, missing_rate=0.01, loss_rate=0.02, seed=0
+):
+    """
+    Writes `docs` documents to a new stand-in file.
+
+    Besides the configured types, about 2% of the documents have an ignored
+    or unknown type, about 5% are linked to two products (the duplicates the
+    LEFT JOINs produce) and `missing_rate` have no Postgres row. Modification
+    times (ISO text, for `--watch`) are spread over the last
+    MODIFIED_SPREAD_DAYS days.
+    """
+    rng = random.Random(seed)
+    docs_per_type = max(1, distinct // len(TYPE_CONFIG))
+    pool = list(
+        generate_corpus(docs_per_type, seed, scale, loss_rate=loss_rate)
+    )
+    id_width = len(str(docs))
+    # Own generator, so the documents are the same as without the column
+    clock = random.Random(seed)
+    now = datetime.datetime.now().replace(microsecond=0)
+    spread = MODIFIED_SPREAD_DAYS * 86400
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    create_schema(conn)
+
+    documents, artikel, produkt = [], [], []
+    pg_rows = {config["table"]: [] for config in TYPE_CONFIG.values()}
+
+    def flush():
+        conn.executemany("INSERT INTO T_DOKUMENT VALUES (?, ?, ?, ?, ?)", documents)
+        conn.executemany("INSERT INTO T_DOKUMENT_ARTIKEL VALUES (?)", artikel)
+        conn.executemany("INSERT INTO T_DOKUMENT_PRODUKT VALUES (?)", produkt)
+        for table, rows in pg_rows.items():
+            conn.executemany(f'INSERT INTO "{table}" VALUES (?, ?, ?)', rows)
+            rows.clear()
+        conn.commit()
+        documents.clear()
+        artikel.clear()
+        produkt.clear()
+
+    for i in range(docs):
+        doc_id = str(i + 1).zfill(id_width)
+        _, doc_type, oracle_xml, pg_html = pool[i % len(pool)]
+        if rng.random() < 0.02:
+            doc_type = rng.choice(OTHER_TYPES)
+
+        modified = now - datetime.timedelta(seconds=clock.randrange(spread))
+        documents.append(
+            (doc_id, doc_type, oracle_xml, f"Dokument {doc_id}", str(modified))
+        )
+        links = artikel if doc_type in ARTIKEL_TYPES else produkt
+        links.append((doc_id,))
+        if rng.random() < 0.05:
+            links.append((doc_id,))
+
+        if doc_type in TYPE_CONFIG and rng.random() >= missing_rate:
+            pg_rows[TYPE_CONFIG[doc_type]["table"]].append(
+                (doc_id, pg_html, f"npl{doc_id}")
+            )
+
+        if len(documents) >= INSERT_BATCH:
+            flush()
+            print(f"\r{i + 1}/{docs} documents", end="", flush=True)
+
+    flush()
+    create_indexes(conn)
+    conn.close()
+    print(f"\r{docs}/{docs} documents")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Fill an SQLite stand-in database.")
+    parser.add_argument("path", help="Stand-in file to create.")
+    parser.add_argument(
+        "--docs", type=int, default=100000, help="Documents (default: 100000)."
+    )
+    parser.add_argument(
+        "--distinct",
+        type=int,
+        default=1000,
+        help="Distinct document pairs to reuse (default: 1000).",
+    )
+    parser.add_argument(
+        "--scale", type=float, default=0.05, help="Document size factor (default: 0.05)."
+    )
+    parser.add_argument(
+        "--missing-rate",
+        type=float,
+        default=0.01,
+        help="Fraction of documents without Postgres row (default: 0.01).",
+    )
+    parser.add_argument(
+        "--loss-rate",
+        type=float,
+        default=0.02,
+        help="Fraction of paragraphs dropped from the HTML (default: 0.02).",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed (default: 0).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if os.path.exists(args.path):
+        print(f"{args.path} already exists, remove it first.")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    generate_fixtures(
+        args.path,
+        args.docs,
+        args.distinct,
+        args.scale,
+        args.missing_rate,
+        args.loss_rate,
+        args.seed,
+    )
+    size_mb = os.path.getsize(args.path) / 1e6
+    print(
+        f"Wrote {args.path} ({size_mb:.0f} MB) in {time.perf_counter() - started:.0f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
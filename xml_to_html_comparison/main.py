@@ -1,61 +1,48 @@
 import argparse
+import contextlib
 import csv
 import datetime
 import logging
+import multiprocessing
 import os
+import sqlite3
 import sys
-from collections import Counter
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-import oracledb
-import psycopg2
-from config import (DEFAULT_LOSS_THRESHOLD, ENV_CONFIG, IGNORED_TYPES,
-                    TYPE_CONFIG)
-from queries import build_oracle_query, fetch_postgres_content
-from validation import validate_content
+from breaker import CircuitBreaker
+from checkpoint import (DEFAULT_CHECKPOINT_INTERVAL, Checkpointer,
+                        checkpoint_path_for, load_checkpoint,
+                        prepare_csv_for_resume)
+from config import (ABORT_FAILURE_RATE, ABORT_MIN_DOCS, DEFAULT_LOSS_THRESHOLD,
+                    ENV_CONFIG, HTML_BACKEND, IGNORED_TYPES, ORACLE_ARRAYSIZE,
+                    ORACLE_BATCH_SIZE, ORACLE_LOBS_AS_STR, ORACLE_PREFETCHROWS,
+                    PG_POOL_SIZE, PIPELINE_QUEUE_SIZE, TOKEN_HASHING, TYPE_CONFIG,
+                    WATCH_LAG, WATCH_POLL_INTERVAL, XML_STREAMING)
+from corpus import CorpusReader, CorpusWriter
+from diff import CHANGES, diff_reports
+from merge import merge_shards
+from pipeline import prefetch
+from queries import (LobChunks, build_excluded_types_query, build_oracle_query,
+                     build_type_totals_query, fetch_postgres_batch)
+from results import CsvResultWriter, ParquetResultWriter, parquet_path_for
+from sources import open_sources
+from stats import (DocCounter, log_failure_estimates, stats_path_for,
+                   write_stats_file)
+from state import (DEFAULT_STATE_FILE, ValidationState, config_signature,
+                   content_digest)
+from sweep import DEFAULT_THRESHOLDS, sweep_documents, write_sweep_matrix
+from validation import (HTML_BACKENDS, set_html_backend, set_token_hashing,
+                        set_xml_streaming, validate_content)
+from watch import (load_watermark, poll_windows, save_watermark,
+                   watermark_path_for)
+
+CSV_HEADER = ["doc_id", "doc_type", "table", "status", "loss", "url", "missing"]
 
 # --- LOGGING SETUP ---
 logger = logging.getLogger("validator")
 
 
-class DocCounter:
-    """Tracks document statistics by type."""
-    def __init__(self):
-        self.total_by_type = Counter()
-        self.processed_by_type = Counter()
-        self.stats = {"processed": 0, "failures": 0, "skipped": 0}
-
-    def register_batch(self, rows):
-        """Pre-scans a batch to update total counts."""
-        for row in rows:
-            try:
-                doc_type = row[1]
-                self.total_by_type[doc_type] += 1
-            except IndexError:
-                continue
-
-    def update(self, doc_type, status):
-        """Updates progress for a specific document."""
-        self.processed_by_type[doc_type] += 1
-        
-        if status == "SUCCESS":
-            self.stats["processed"] += 1
-        elif status == "FAIL":
-            self.stats["failures"] += 1
-            self.stats["processed"] += 1
-        elif status == "SKIPPED":
-            self.stats["skipped"] += 1
-
-    def log_progress(self):
-        """Logs current progress per document type."""
-        if self.stats["processed"] > 0 and self.stats["processed"] % 1000 == 0:
-            logger.info(f"--- Progress: {self.stats['processed']} docs processed ---")
-            for dtype, total in self.total_by_type.items():
-                processed = self.processed_by_type[dtype]
-                remaining = total - processed
-                if remaining > 0: # Only show active types
-                    logger.info(f"   Type {dtype}: {processed}/{total} done ({remaining} remaining)")
-
-
 def setup_logging(debug_mode, output_dir, doc_id=None):
     """Configures console and file logging."""
     logger.handlers = []
@@ -81,22 +68,39 @@ def setup_logging(debug_mode, output_dir, doc_id=None):
         logger.setLevel(logging.INFO)
 
 
-def write_result_to_csv(
-    csv_writer, doc_id, doc_type, table_short, status, loss="", url="", msg=""
-):
-    """Helper to write a standardized row to the CSV output."""
-    csv_writer.writerow(
-        [doc_id, doc_type, table_short, status, str(loss).replace(".", ","), url, msg]
-    )
+@contextlib.contextmanager
+def open_report(path, output_format="csv", append=False):
+    """
+    Opens the result report of a run.
 
+    Yields:
+        tuple: (writer, file), the writer a `CsvResultWriter` or
+        `ParquetResultWriter`; `file` is the CSV file the checkpoints point
+        into, None for Parquet.
+    """
+    if output_format == "parquet":
+        with ParquetResultWriter(path) as writer:
+            yield writer, None
+        return
+
+    mode = "a" if append else "w"
+    with open(path, mode=mode, newline="", encoding="utf-8-sig") as f:
+        csv_writer = csv.writer(f)
+        if not append:
+            csv_writer.writerow(CSV_HEADER)
+        yield CsvResultWriter(csv_writer), f
 
-def process_single_document(row, pg_cursor, csv_writer, unknown_types, url_base):
+
+def prepare_document(row, pg_contents, unknown_types, stream_lobs=False):
     """
-    Processes a single row from Oracle:
+    Resolves everything a single Oracle row needs before validation:
     1. Checks if type is valid.
-    2. Fetches corresponding Postgres content.
-    3. Runs validation logic.
-    4. Writes result to CSV.
+    2. Looks up the corresponding Postgres content (see `fetch_postgres_batch`).
+    3. Reads the Oracle CLOB, or wraps it in `LobChunks` with `stream_lobs`.
+
+    Returns:
+        dict | str: A job dict for `finish_document`, or a final status
+        ("SKIPPED"/"ERROR") when the row can not be validated.
     """
     try:
         doc_id, doc_type, clob_obj, doc_name = row
@@ -115,30 +119,79 @@ def process_single_document(row, pg_cursor, csv_writer, unknown_types, url_base)
         return "SKIPPED"
 
     config = TYPE_CONFIG[doc_type]
+    job = {
+        "doc_id": doc_id,
+        "doc_type": doc_type,
+        "config": config,
+        "table_short": config["table"].split(".")[-1],
+        "pg_result": pg_contents.get((config["table"], str(doc_id))),
+        "oracle_clob": None,
+    }
 
-    # Fetch Postgres Data
-    pg_result = fetch_postgres_content(pg_cursor, doc_id, config)
-    table_short = config["table"].split(".")[-1]
+    if job["pg_result"]:
+        if not hasattr(clob_obj, "read"):
+            job["oracle_clob"] = str(clob_obj)
+        elif stream_lobs:
+            job["oracle_clob"] = LobChunks(clob_obj)
+        else:
+            job["oracle_clob"] = clob_obj.read()
 
-    if not pg_result:
-        msg = f"Doc ID {doc_id} not found in Postgres table {config['table']}"
-        logger.warning(msg)
-        write_result_to_csv(
-            csv_writer, doc_id, doc_type, table_short, "MISSING_IN_PG", msg=msg
-        )
-        return "FAIL"
+    return job
 
-    # Validate
-    oracle_clob = clob_obj.read() if hasattr(clob_obj, "read") else str(clob_obj)
-    pg_html, link_id = pg_result
 
-    result = validate_content(
-        oracle_clob,
-        pg_html,
+def validation_args(job):
+    """Returns the (oracle_clob, pg_html, threshold, ignore_tags) arguments for a job."""
+    config = job["config"]
+    return (
+        job["oracle_clob"],
+        job["pg_result"][0],
         config.get("loss_threshold", DEFAULT_LOSS_THRESHOLD),
         config.get("ignore_tags", []),
     )
 
+
+def validate_job(args):
+    """
+    Runs `validate_content` on a `validation_args` tuple (picklable for workers).
+
+    Returns:
+        tuple: (result, {stage: seconds})
+    """
+    timings = {}
+    return validate_content(*args, timings=timings), timings
+
+
+def apply_cached_verdict(job, state):
+    """
+    Digests the job's content and reuses the stored verdict when nothing
+    changed since the last run. Returns True on a cache hit.
+    """
+    oracle_clob, pg_html, threshold, ignore_tags = validation_args(job)
+    job["state_key"] = (
+        content_digest(oracle_clob),
+        content_digest(pg_html),
+        config_signature(threshold, ignore_tags),
+    )
+    hit, result = state.lookup(job["doc_id"], *job["state_key"])
+    if hit:
+        logger.debug(f"Doc ID {job['doc_id']} unchanged, reusing cached verdict.")
+        job["result"] = result
+    return hit
+
+
+def finish_document(job, result, report_writer, url_base):
+    """Reports the validation result of a prepared job and writes it to the report."""
+    doc_id, doc_type = job["doc_id"], job["doc_type"]
+    config, table_short = job["config"], job["table_short"]
+
+    if not job["pg_result"]:
+        msg = f"Doc ID {doc_id} not found in Postgres table {config['table']}"
+        logger.warning(msg)
+        report_writer.write_result(
+            doc_id, doc_type, table_short, "MISSING_IN_PG", msg=msg
+        )
+        return "FAIL"
+
     if not result:
         logger.info(
             f"SKIPPED: ID: {doc_id} | Type: {doc_type} | No content to validate."
@@ -146,28 +199,27 @@ def process_single_document(row, pg_cursor, csv_writer, unknown_types, url_base)
         return "SKIPPED"
 
     # Generate URL using base from env config
+    link_id = job["pg_result"][1]
     url = config["url_template"].format(link_id, base=url_base) if link_id else "N/A"
 
     if result["status"] == "FAIL":
         logger.info(
             f"FAIL: ID: {doc_id} | Type: {doc_type} | Loss: {result['loss_raw']:.2%}"
         )
-        write_result_to_csv(
-            csv_writer,
+        report_writer.write_result(
             doc_id,
             doc_type,
             table_short,
             "FAIL",
             result["loss_raw"],
             url,
-            ", ".join(result["missing"]),
+            missing=result["missing"],
         )
         return "FAIL"
 
     if result["status"] == "ERROR":
         logger.error(f"ERROR: ID: {doc_id}: {result['msg']}")
-        write_result_to_csv(
-            csv_writer,
+        report_writer.write_result(
             doc_id,
             doc_type,
             table_short,
@@ -181,62 +233,331 @@ def process_single_document(row, pg_cursor, csv_writer, unknown_types, url_base)
     return "SUCCESS"
 
 
-def get_db_connections(env_config):
-    """Establishes connections to both Oracle and Postgres."""
-    ora_conf = env_config["ORA"]
-    pg_conf = env_config["PG"]
+def count_excluded_types(source, query):
+    """
+    Runs the metadata-only query for the types the main query leaves out and
+    warns about the unknown ones, like `prepare_document` does per row.
 
-    ora_conn = oracledb.connect(
-        user=ora_conf["USER"],
-        password=ora_conf["PASS"],
-        dsn=ora_conf["DSN"],
-    )
-    pg_conn = psycopg2.connect(
-        dbname=pg_conf["DB"],
-        user=pg_conf["USER"],
-        password=pg_conf["PASS"],
-        host=pg_conf["HOST"],
-        port=pg_conf["PORT"],
-    )
-    return ora_conn, pg_conn
+    Returns:
+        dict: doc_type -> number of documents
+    """
+    excluded = {}
+    for doc_type, count, doc_name in source.execute(query).fetchall():
+        if doc_type not in IGNORED_TYPES:
+            logger.warning(f"Unknown Type ID: {doc_type} | Name example: {doc_name}")
+        excluded[doc_type] = count
+    return excluded
 
 
-def process_batch(rows, pg_cursor, csv_writer, context):
-    """Iterates through a batch of rows and processes them."""
-    unknown_types, processed_ids, url_base, counter = context
-    
-    # Pre-register batch for accurate "Total" counts
-    counter.register_batch(rows)
+def dedupe_rows(rows, last_doc_id=None):
+    """
+    Drops repeated DOK_IDs. The queries are ordered by DOK_ID, so a repeat
+    always follows its first row directly and only the previous DOK_ID (from
+    the last batch: `last_doc_id`) has to be remembered, not every ID seen.
 
+    Returns:
+        tuple: (unique_rows, last_doc_id)
+    """
+    unique_rows = []
     for row in rows:
-        try:
-            doc_id, doc_type = row[0], row[1]
-        except IndexError:
+        if len(row) < 2 or row[0] == last_doc_id:
             continue
+        last_doc_id = row[0]
+        unique_rows.append(row)
+    return unique_rows, last_doc_id
+
+
+def read_clobs(rows, timer, breaker=None):
+    """Materializes the CLOBs of the rows that will be validated."""
+    read_rows = []
+    for row in rows:
+        doc_type, clob_obj = row[1], row[2]
+        aborted = breaker is not None and breaker.is_open(doc_type)
+        if doc_type in TYPE_CONFIG and doc_type not in IGNORED_TYPES and not aborted:
+            if hasattr(clob_obj, "read"):
+                started = time.perf_counter()
+                row = (row[0], doc_type, clob_obj.read(), *row[3:])
+                timer.add("clob_read", time.perf_counter() - started, doc_type)
+        read_rows.append(row)
+    return read_rows
+
+
+def read_stage(
+    ora_cursor,
+    timer,
+    materialize_clobs=False,
+    batch_size=ORACLE_BATCH_SIZE,
+    breaker=None,
+):
+    """
+    Stage 1: fetches Oracle batches of `batch_size` rows.
+
+    Yields:
+        tuple: (rows, unique_rows). With `materialize_clobs`, CLOBs are read
+        here so later stages never touch the Oracle connection.
+    """
+    last_doc_id = None
+    while True:
+        started = time.perf_counter()
+        rows = ora_cursor.fetchmany(batch_size)
+        timer.add("oracle_fetch", time.perf_counter() - started)
+        if not rows:
+            return
+
+        unique_rows, last_doc_id = dedupe_rows(rows, last_doc_id)
+        if materialize_clobs:
+            unique_rows = read_clobs(unique_rows, timer, breaker)
+        yield rows, unique_rows
+
+
+def resolve_batch(
+    unique_rows, store, unknown_types, timer, stream_lobs=False, breaker=None
+):
+    """
+    Stage 2 for one batch: resolves the Postgres content with one query per
+    table and prepares a job (or final status) per row. Rows of types whose
+    `breaker` is open are "ABORTED" without a lookup.
+    """
+    # Fixed for the batch, the breaker may open meanwhile with --pipeline
+    aborted_types = set(breaker.tripped) if breaker is not None else set()
+    pg_contents = fetch_postgres_batch(
+        store,
+        [
+            row
+            for row in unique_rows
+            if row[1] not in IGNORED_TYPES and row[1] not in aborted_types
+        ],
+        timer,
+    )
 
-        if doc_id in processed_ids:
+    prepared = []
+    for row in unique_rows:
+        if row[1] in aborted_types:
+            prepared.append((row[1], "ABORTED"))
             continue
-        processed_ids.add(doc_id)
+        started = time.perf_counter()
+        job = prepare_document(row, pg_contents, unknown_types, stream_lobs)
+        if isinstance(job, dict) and job["pg_result"] and hasattr(row[2], "read"):
+            timer.add("clob_read", time.perf_counter() - started, row[1])
+        prepared.append((row[1], job))
+    return prepared
 
-        status = process_single_document(
-            row, pg_cursor, csv_writer, unknown_types, url_base
+
+def resolve_stage(
+    batches, store, unknown_types, timer, stream_lobs=False, breaker=None
+):
+    """Stage 2: resolves every batch coming from `read_stage`."""
+    for rows, unique_rows in batches:
+        prepared = resolve_batch(
+            unique_rows, store, unknown_types, timer, stream_lobs, breaker
         )
-        
-        counter.update(doc_type, status)
+        yield rows, prepared
+
+
+def content_sizes(job):
+    """Returns the (CLOB, HTML) characters a prepared job validated."""
+    if not isinstance(job, dict) or not job["pg_result"]:
+        return 0, 0
+    clob = job["oracle_clob"]
+    clob_chars = clob.chars_read if isinstance(clob, LobChunks) else len(clob or "")
+    return clob_chars, len(job["pg_result"][0] or "")
+
+
+def write_batch(
+    rows,
+    prepared,
+    report_writer,
+    context,
+    executor=None,
+    state=None,
+    capture=None,
+    breaker=None,
+):
+    """
+    Stage 3 for one batch: validates the prepared jobs and writes the results.
+
+    With an executor, `validate_content` runs in the worker processes;
+    results are still consumed in row order, so the CSV and the counters
+    match a serial run. With a `ValidationState`, unchanged documents reuse
+    their last verdict. With a `CorpusWriter`, the content of every validated
+    document is captured for `--replay`. With a `CircuitBreaker`, jobs of
+    aborted types are dropped and every verdict is recorded.
+    """
+    _, url_base, counter = context
+    timer = counter.timer
+
+    # Pre-register batch for accurate "Total" counts
+    counter.register_batch(rows)
+
+    if breaker is not None:
+        prepared = [
+            (doc_type, "ABORTED" if breaker.is_open(doc_type) else job)
+            for doc_type, job in prepared
+        ]
+
+    jobs = [job for _, job in prepared if isinstance(job, dict) and job["pg_result"]]
+    if state is not None:
+        counter.stats["cached"] += sum(apply_cached_verdict(job, state) for job in jobs)
+
+    pending = [job for job in jobs if "result" not in job]
+    validate_map = executor.map if executor else map
+    results = validate_map(validate_job, [validation_args(job) for job in pending])
+
+    for doc_type, job in prepared:
+        if isinstance(job, str):
+            status = job
+        else:
+            if job["pg_result"] and "result" not in job:
+                job["result"], timings = next(results)
+                timer.add_all(timings, doc_type)
+                if state is not None:
+                    state.store(job["doc_id"], *job["state_key"], job["result"])
+
+            started = time.perf_counter()
+            status = finish_document(job, job.get("result"), report_writer, url_base)
+            timer.add("csv_write", time.perf_counter() - started, doc_type)
+
+            if capture is not None:
+                pg_html, link_id = job["pg_result"] or (None, None)
+                capture.store(
+                    job["doc_id"], doc_type, job["oracle_clob"], pg_html, link_id
+                )
+
+        counter.update(doc_type, status, *content_sizes(job))
+        if breaker is not None:
+            breaker.record(doc_type, counter)
         counter.log_progress()
 
+    if state is not None:
+        state.commit()
+    if capture is not None:
+        capture.commit()
 
-def run_validation_loop(ora_cursor, pg_cursor, csv_writer, current_env):
-    """Main loop fetching batches from Oracle."""
-    context = (set(), set(), current_env["URL_BASE"], DocCounter())
-    
-    while True:
-        rows = ora_cursor.fetchmany(100)
-        if not rows:
-            break
-        process_batch(rows, pg_cursor, csv_writer, context)
-        
-    return context[3].stats  # Return stats from counter
+
+def init_worker(log_level, html_backend, xml_streaming, hash_tokens):
+    """Mirrors the parent's log level and parser settings in a validation worker process."""
+    set_html_backend(html_backend)
+    set_xml_streaming(xml_streaming)
+    set_token_hashing(hash_tokens)
+    logger.setLevel(log_level)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+        logger.addHandler(handler)
+
+
+def run_validation_loop(
+    ora_cursor,
+    store,
+    report_writer,
+    current_env,
+    workers=1,
+    state=None,
+    checkpointer=None,
+    resume_from=None,
+    html_backend=HTML_BACKEND,
+    xml_streaming=XML_STREAMING,
+    pipeline=False,
+    batch_size=ORACLE_BATCH_SIZE,
+    capture=None,
+    abort_after=None,
+    abort_rate=ABORT_FAILURE_RATE,
+    hash_tokens=TOKEN_HASHING,
+    type_totals=None,
+):
+    """
+    Main loop fetching batches from Oracle.
+
+    Every batch goes through three stages: Oracle read, Postgres resolve and
+    validate/write. By default they run in lockstep. With `pipeline`, the
+    first two run in background threads connected by bounded queues
+    (PIPELINE_QUEUE_SIZE batches), so network I/O overlaps with validation
+    while validation and CSV writes stay on this thread, in row order.
+
+    With a `Checkpointer`, the resume point is saved after every batch once
+    enough documents have been handled; `resume_from` is a loaded checkpoint
+    whose counters are carried over.
+
+    With `abort_after`, a type is aborted once that many of its documents
+    are validated and more than `abort_rate` of them failed (see
+    `CircuitBreaker`); its remaining documents are counted as aborted.
+
+    With `xml_streaming`, CLOBs are parsed incrementally. In lockstep serial
+    runs without a state store they are also read piecewise, so a document's
+    XML is never held in memory as a whole; workers, digests, the pipeline
+    and capturing need the full string and still read it at once. With
+    `hash_tokens`, token sets are compared as hashed arrays (see
+    `calculate_hashed_loss`).
+
+    `type_totals` ({doc_type: count} of the whole query) gives the progress
+    logs an ETA per type.
+    """
+    set_html_backend(html_backend)
+    set_xml_streaming(xml_streaming)
+    set_token_hashing(hash_tokens)
+    context = (set(), current_env["URL_BASE"], DocCounter())
+    unknown_types, _, counter = context
+    if resume_from:
+        counter.restore(resume_from["counter"])
+    if type_totals:
+        counter.set_expected(type_totals)
+    last_doc_id = resume_from["last_doc_id"] if resume_from else None
+    breaker = CircuitBreaker(abort_after, abort_rate)
+
+    executor = None
+    if workers > 1:
+        logger.info(f"Validating with {workers} worker processes.")
+        # Forked workers could inherit locks held by the pipeline and
+        # Postgres pool threads, so they start from a clean process instead.
+        start_method = "spawn"
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            start_method = "forkserver"
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=init_worker,
+            initargs=(logger.level, html_backend, xml_streaming, hash_tokens),
+        )
+
+    stream_lobs = xml_streaming and executor is None and state is None
+    stream_lobs = stream_lobs and not pipeline and capture is None
+
+    batches = read_stage(ora_cursor, counter.timer, pipeline, batch_size, breaker)
+    if pipeline:
+        logger.info("Running Oracle reads and Postgres lookups in a pipeline.")
+        batches = prefetch(batches, PIPELINE_QUEUE_SIZE, "oracle-reader")
+    batches = resolve_stage(
+        batches, store, unknown_types, counter.timer, stream_lobs, breaker
+    )
+    if pipeline:
+        batches = prefetch(batches, PIPELINE_QUEUE_SIZE, "pg-resolver")
+
+    try:
+        for rows, prepared in batches:
+            write_batch(
+                rows, prepared, report_writer, context, executor, state, capture, breaker
+            )
+            last_doc_id = rows[-1][0]
+            if checkpointer is not None:
+                checkpointer.maybe_save(last_doc_id, counter)
+    finally:
+        batches.close()
+        if executor is not None:
+            executor.shutdown()
+
+    if checkpointer is not None:
+        checkpointer.save(last_doc_id, counter, complete=True)
+
+    breaker.log_summary(counter)
+    return counter
+
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 def parse_arguments():
@@ -255,11 +576,400 @@ def parse_arguments():
     parser.add_argument(
         "--debug", action="store_true", help="Enable verbose debug logging."
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of validation processes (default: 1, serial).",
+    )
+    parser.add_argument(
+        "--html-backend",
+        type=str,
+        default=HTML_BACKEND,
+        choices=HTML_BACKENDS.keys(),
+        help=f"Postgres HTML text extraction (default: {HTML_BACKEND}, 'bs4' is the reference).",
+    )
+    parser.add_argument(
+        "--stream-xml",
+        action="store_true",
+        default=XML_STREAMING,
+        help="Parse Oracle XML incrementally with bounded memory (large CLOBs).",
+    )
+    parser.add_argument(
+        "--hash-tokens",
+        action="store_true",
+        default=TOKEN_HASHING,
+        help="Compare tokens as sorted 64-bit hash arrays (less memory, needs numpy).",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Overlap Oracle reads and Postgres lookups with validation.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=ORACLE_BATCH_SIZE,
+        help=f"Oracle rows per batch (default: {ORACLE_BATCH_SIZE}).",
+    )
+    parser.add_argument(
+        "--arraysize",
+        type=int,
+        default=ORACLE_ARRAYSIZE,
+        help=f"Oracle rows per fetch round-trip (default: {ORACLE_ARRAYSIZE}).",
+    )
+    parser.add_argument(
+        "--prefetchrows",
+        type=int,
+        default=ORACLE_PREFETCHROWS,
+        help=f"Oracle rows returned with the query execute (default: {ORACLE_PREFETCHROWS}).",
+    )
+    parser.add_argument(
+        "--fetch-lobs-as-str",
+        action="store_true",
+        default=ORACLE_LOBS_AS_STR,
+        help="Fetch CLOBs inline as strings instead of one LOB read per document.",
+    )
+    parser.add_argument(
+        "--pg-pool-size",
+        type=positive_int,
+        default=PG_POOL_SIZE,
+        help=f"Postgres connections for the content lookups (default: {PG_POOL_SIZE}).",
+    )
+    parser.add_argument(
+        "--incremental",
+        nargs="?",
+        const=DEFAULT_STATE_FILE,
+        metavar="STATE_FILE",
+        help=f"Reuse verdicts of unchanged documents (default file: {DEFAULT_STATE_FILE}).",
+    )
+    parser.add_argument(
+        "--standin",
+        metavar="FIXTURE_FILE",
+        help="Run against an SQLite stand-in (see fixtures.py) instead of the databases.",
+    )
+    parser.add_argument(
+        "--capture",
+        metavar="CORPUS_FILE",
+        help="Also store the content of every validated document in a local corpus.",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="CORPUS_FILE",
+        help="Validate a captured corpus instead of the databases.",
+    )
+    parser.add_argument(
+        "--abort-after",
+        nargs="?",
+        type=int,
+        const=ABORT_MIN_DOCS,
+        metavar="M",
+        help=f"Abort a type that keeps failing after M validated documents (default M: {ABORT_MIN_DOCS}).",
+    )
+    parser.add_argument(
+        "--abort-rate",
+        type=float,
+        default=ABORT_FAILURE_RATE,
+        metavar="F",
+        help=f"Failure rate above which --abort-after aborts a type (default: {ABORT_FAILURE_RATE}).",
+    )
+    parser.add_argument(
+        "--sample",
+        type=int,
+        metavar="N",
+        help="Only validate N documents per type, picked by DOK_ID hash.",
+    )
+    parser.add_argument(
+        "--sample-rate",
+        type=float,
+        metavar="F",
+        help="Only validate the share F (e.g. 0.01) of the documents of every type.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and validate documents as they are modified.",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=int,
+        default=WATCH_POLL_INTERVAL,
+        metavar="SECONDS",
+        help=f"Seconds between --watch polls (default: {WATCH_POLL_INTERVAL}).",
+    )
+    parser.add_argument(
+        "--since",
+        type=datetime.datetime.fromisoformat,
+        metavar="TIMESTAMP",
+        help="Start --watch after this modification time (default: stored mark).",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=["csv", "parquet"],
+        default="csv",
+        help="Report format; parquet has typed columns and needs pyarrow (default: csv).",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        metavar="N",
+        help=f"Save a resume checkpoint every N documents (default: {DEFAULT_CHECKPOINT_INTERVAL}).",
+    )
+    parser.add_argument(
+        "--shard",
+        type=str,
+        metavar="K/N",
+        help="Only process shard K of N (hash of DOK_ID), e.g. 0/4.",
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const=True,
+        metavar="CHECKPOINT",
+        help="Continue an interrupted run from its checkpoint (default: today's checkpoint for this query).",
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    merge_parser = subparsers.add_parser(
+        "merge", help="Combine shard reports into the standard report."
+    )
+    merge_parser.add_argument("reports", nargs="+", help="Shard CSV reports.")
+    merge_parser.add_argument(
+        "--output", type=str, help="Merged report path (default: name without shard)."
+    )
+    sweep_parser = subparsers.add_parser(
+        "sweep", help="Failure counts per type over thresholds and ignore tags."
+    )
+    sweep_parser.add_argument("corpus", help="Corpus file written with --capture.")
+    sweep_parser.add_argument(
+        "--thresholds",
+        type=lambda value: [float(t) for t in value.split(",")],
+        default=DEFAULT_THRESHOLDS,
+        help="Comma separated loss thresholds (default: 0,0.01,0.02,0.05,0.1).",
+    )
+    sweep_parser.add_argument(
+        "--tags",
+        type=lambda value: [t.strip() for t in value.split(",")],
+        default=[],
+        help="Candidate ignore tags besides each type's configured ones.",
+    )
+    sweep_parser.add_argument(
+        "--types", type=str, help="Comma separated list of document types."
+    )
+    sweep_parser.add_argument(
+        "--output", type=str, help="Matrix CSV path (default: sweep_<corpus>.csv)."
+    )
+    diff_parser = subparsers.add_parser(
+        "diff", help="New failures, fixes and loss changes between two reports."
+    )
+    diff_parser.add_argument("old", help="Earlier report (CSV or Parquet).")
+    diff_parser.add_argument("new", help="Later report of the same selection.")
+    diff_parser.add_argument(
+        "--min-change",
+        type=float,
+        default=0.0,
+        help="Loss difference below which a failure counts as unchanged (default: 0).",
+    )
+    diff_parser.add_argument(
+        "--output",
+        type=str,
+        help="Difference CSV path (default: diff_<new report>.csv next to it).",
+    )
     return parser.parse_args()
 
 
+def log_summary(stats):
+    logger.info(
+        f"Done. Processed: {stats['processed']}. "
+        f"Failures: {stats['failures']}. Skipped: {stats['skipped']}"
+    )
+    if stats.get("aborted"):
+        logger.warning(f"Aborted (circuit breaker): {stats['aborted']}")
+
+
+def run_merge(args):
+    """Entry point of the `merge` subcommand."""
+    setup_logging(False, None)
+    try:
+        output_path, counter = merge_shards(args.reports, args.output)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    log_summary(counter.stats)
+    logger.info(f"Merged {len(args.reports)} reports into: {output_path}")
+
+
+def run_replay(args, current_env, output_dir):
+    """
+    Validates a corpus captured with `--capture` against the current config.
+    Runs the regular loop on `CorpusReader` instead of the databases, so the
+    database drivers are never imported.
+    """
+    types = None
+    suffix = "all"
+    if args.doc_id:
+        suffix = args.doc_id
+    elif args.types:
+        types = [int(t.strip()) for t in args.types.split(",")]
+        suffix = "types_" + "_".join(map(str, types))
+    corpus_name = os.path.splitext(os.path.basename(args.replay))[0]
+    output_file_path = os.path.join(output_dir, f"replay_{corpus_name}_{suffix}.csv")
+    if args.output_format == "parquet":
+        output_file_path = parquet_path_for(output_file_path)
+
+    try:
+        with CorpusReader(args.replay) as corpus, open_report(
+            output_file_path, args.output_format
+        ) as (report_writer, _):
+            logger.info(f"Replaying corpus: {args.replay}")
+            counter = run_validation_loop(
+                corpus.cursor(types, args.doc_id),
+                corpus,
+                report_writer,
+                current_env,
+                workers=args.workers,
+                html_backend=args.html_backend,
+                xml_streaming=args.stream_xml,
+                pipeline=args.pipeline,
+                batch_size=args.batch_size,
+                abort_after=args.abort_after,
+                abort_rate=args.abort_rate,
+                hash_tokens=args.hash_tokens,
+            )
+    except sqlite3.Error as e:
+        logger.critical(f"Corpus Error ({args.replay}): {e}")
+        sys.exit(1)
+
+    write_stats_file(stats_path_for(output_file_path), counter)
+    counter.timer.log_summary()
+    log_summary(counter.stats)
+    logger.info(f"Results written to: {output_file_path}")
+
+
+def run_sweep(args):
+    """Entry point of the `sweep` subcommand."""
+    setup_logging(False, None)
+    types = None
+    if args.types:
+        types = [int(t.strip()) for t in args.types.split(",")]
+    corpus_name = os.path.splitext(os.path.basename(args.corpus))[0]
+    output_path = args.output or f"sweep_{corpus_name}.csv"
+
+    try:
+        with CorpusReader(args.corpus) as corpus:
+            logger.info(f"Sweeping corpus: {args.corpus}")
+            results = sweep_documents(
+                corpus.documents(types), args.thresholds, args.tags
+            )
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    with open(output_path, mode="w", newline="", encoding="utf-8-sig") as f:
+        write_sweep_matrix(csv.writer(f), results, args.thresholds)
+
+    for doc_type, result in sorted(results.items()):
+        logger.info(f"Type {doc_type} ({result['docs']} docs), failures per threshold:")
+        for combination, counts in result["failures"].items():
+            ignored = "|".join(combination) or "(none)"
+            logger.info(f"   {ignored:<50} {' '.join(f'{c:>6}' for c in counts)}")
+    logger.info(f"Sweep matrix written to: {output_path}")
+
+
+def run_diff(args):
+    """Entry point of the `diff` subcommand."""
+    setup_logging(False, None)
+    new_dir, new_name = os.path.split(args.new)
+    output_path = args.output or os.path.join(
+        new_dir, f"diff_{os.path.splitext(new_name)[0]}.csv"
+    )
+
+    try:
+        with open(output_path, mode="w", newline="", encoding="utf-8-sig") as f:
+            counts = diff_reports(args.old, args.new, csv.writer(f), args.min_change)
+    except (OSError, ValueError) as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    logger.info(f"Changes from {args.old} to {args.new}:")
+    logger.info(f"   {'type':>6} " + " ".join(f"{c:>12}" for c in CHANGES))
+    for doc_type in sorted(counts, key=int):
+        type_counts = counts[doc_type]
+        logger.info(
+            f"   {doc_type:>6} " + " ".join(f"{type_counts[c]:>12}" for c in CHANGES)
+        )
+    totals = {c: sum(t[c] for t in counts.values()) for c in CHANGES}
+    logger.info(
+        f"Done. New failures: {totals['NEW_FAILURE']}. "
+        f"Fixed: {totals['FIXED']}. Changed: {totals['CHANGED']}"
+    )
+    logger.info(f"Differences written to: {output_path}")
+
+
+def run_watch(args, source, store, query, report, current_env, state, capture):
+    """
+    Validates the documents modified since the high-water mark of the report,
+    then polls for new modifications every `--poll-interval` seconds until
+    interrupted. Results are flushed to the report after every poll.
+
+    Returns:
+        DocCounter: The counts of all polls.
+    """
+    report_writer, report_file, output_file_path = report
+    mark_file = watermark_path_for(output_file_path)
+    since = args.since or load_watermark(mark_file) or datetime.datetime.now()
+    logger.info(
+        f"Watching for documents modified after {since:%Y-%m-%d %H:%M:%S}, "
+        f"polling every {args.poll_interval}s."
+    )
+
+    total = DocCounter()
+    try:
+        for window_start, until in poll_windows(since, args.poll_interval, WATCH_LAG):
+            counter = run_validation_loop(
+                source.execute(query, {"since": window_start, "until": until}),
+                store,
+                report_writer,
+                current_env,
+                workers=args.workers,
+                state=state,
+                html_backend=args.html_backend,
+                xml_streaming=args.stream_xml,
+                pipeline=args.pipeline,
+                batch_size=args.batch_size,
+                capture=capture,
+                abort_after=args.abort_after,
+                abort_rate=args.abort_rate,
+                hash_tokens=args.hash_tokens,
+            )
+            report_file.flush()
+            save_watermark(mark_file, until)
+            total.merge(counter)
+
+            handled = sum(counter.processed_by_type.values())
+            if handled:
+                logger.info(
+                    f"Modified until {until:%H:%M:%S}: {handled} documents, "
+                    f"{counter.stats['failures']} failures."
+                )
+    except KeyboardInterrupt:
+        logger.info("Watch stopped.")
+    return total
+
+
 def main():
     args = parse_arguments()
+    if args.command == "merge":
+        run_merge(args)
+        return
+    if args.command == "sweep":
+        run_sweep(args)
+        return
+    if args.command == "diff":
+        run_diff(args)
+        return
+
     env_key = args.env.upper()
     current_env = ENV_CONFIG[env_key]
 
@@ -269,11 +979,59 @@ def main():
         os.makedirs(timestamp_folder)
 
     setup_logging(args.debug, timestamp_folder, args.doc_id)
+    if args.replay:
+        run_replay(args, current_env, timestamp_folder)
+        return
     logger.info(f"Targeting Environment: {env_key}")
 
+    database_errors = (sqlite3.Error,)
+    if not args.standin:
+        # Imported here so --replay and --standin work without the drivers
+        import oracledb
+        import psycopg2
+
+        database_errors += (oracledb.Error, psycopg2.Error)
+
+    resume_from = None
     try:
-        oracle_query, filename = build_oracle_query(args, env_key)
+        if args.watch:
+            if args.doc_id or args.resume:
+                raise ValueError("--watch can not be combined with --doc_id/--resume.")
+            if args.output_format != "csv":
+                raise ValueError("--watch needs the csv output format.")
+        sampling = bool(args.sample or args.sample_rate)
+        if sampling and (args.doc_id or args.watch):
+            raise ValueError("Sampling can not be combined with --doc_id/--watch.")
+        oracle_query, filename = build_oracle_query(args, env_key, watch=args.watch)
+        excluded_query = None
+        if not (args.watch or sampling):
+            excluded_query = build_excluded_types_query(args)
+        totals_query = None
+        if not args.watch:
+            totals_query = build_type_totals_query(args, env_key)
         output_file_path = os.path.join(timestamp_folder, filename)
+        checkpoint_file = checkpoint_path_for(output_file_path)
+
+        if args.output_format == "parquet":
+            if args.resume:
+                raise ValueError("--resume needs the csv output format.")
+            output_file_path = parquet_path_for(output_file_path)
+
+        if args.resume:
+            if args.resume is not True:
+                checkpoint_file = args.resume
+            resume_from = load_checkpoint(checkpoint_file)
+            if resume_from["complete"]:
+                raise ValueError(f"Run in {checkpoint_file} has already completed.")
+            if os.path.basename(resume_from["csv_path"]) != filename:
+                raise ValueError(
+                    f"Checkpoint {checkpoint_file} belongs to another query "
+                    f"({os.path.basename(resume_from['csv_path'])})."
+                )
+            output_file_path = resume_from["csv_path"]
+            oracle_query, _ = build_oracle_query(
+                args, env_key, resume_from["last_doc_id"]
+            )
     except ValueError as e:
         logger.error(str(e))
         sys.exit(1)
@@ -281,31 +1039,94 @@ def main():
     logger.debug(f"Oracle Query: {oracle_query}")
 
     try:
-        with open(output_file_path, mode="w", newline="", encoding="utf-8-sig") as f:
-            csv_writer = csv.writer(f)
-            csv_writer.writerow(
-                ["doc_id", "doc_type", "table", "status", "loss", "url", "missing"]
-            )
+        if resume_from:
+            prepare_csv_for_resume(output_file_path, resume_from["csv_offset"])
+
+        # A watch keeps appending to its report across restarts
+        append = bool(resume_from)
+        if args.watch:
+            append = os.path.exists(output_file_path)
+        with open_report(output_file_path, args.output_format, append) as report:
+            report_writer, f = report
+            # Parquet rows are only complete once the file is closed
+            checkpointer = None
+            if f is not None and not args.watch:
+                checkpointer = Checkpointer(
+                    checkpoint_file, f, output_file_path, args.checkpoint_every
+                )
 
-            ora_conn, pg_conn = get_db_connections(current_env)
+            source, store = open_sources(args, current_env)
             logger.info("Connected to databases.")
 
-            with ora_conn, pg_conn:
-                with ora_conn.cursor() as ora_cursor, pg_conn.cursor() as pg_cursor:
-                    logger.info("Fetching Oracle documents...")
-                    ora_cursor.execute(oracle_query)
-                    
-                    final_stats = run_validation_loop(
-                        ora_cursor, pg_cursor, csv_writer, current_env
-                    )
+            state = None
+            if args.incremental:
+                logger.info(f"Incremental mode, state file: {args.incremental}")
+                state = ValidationState(args.incremental, env_key)
+            capture = None
+            if args.capture:
+                logger.info(f"Capturing validated documents to: {args.capture}")
+                capture = CorpusWriter(args.capture)
 
-        logger.info(
-            f"Done. Processed: {final_stats['processed']}. "
-            f"Failures: {final_stats['failures']}. Skipped: {final_stats['skipped']}"
-        )
+            try:
+                with source, store:
+                    excluded = {}
+                    if excluded_query:
+                        excluded = count_excluded_types(source, excluded_query)
+                    totals = None
+                    if totals_query:
+                        totals = dict(source.execute(totals_query).fetchall())
+
+                    if args.watch:
+                        counter = run_watch(
+                            args,
+                            source,
+                            store,
+                            oracle_query,
+                            (report_writer, f, output_file_path),
+                            current_env,
+                            state,
+                            capture,
+                        )
+                    else:
+                        logger.info("Fetching Oracle documents...")
+                        documents = source.execute(oracle_query)
+                        counter = run_validation_loop(
+                            documents,
+                            store,
+                            report_writer,
+                            current_env,
+                            workers=args.workers,
+                            state=state,
+                            checkpointer=checkpointer,
+                            resume_from=resume_from,
+                            html_backend=args.html_backend,
+                            xml_streaming=args.stream_xml,
+                            pipeline=args.pipeline,
+                            batch_size=args.batch_size,
+                            capture=capture,
+                            abort_after=args.abort_after,
+                            abort_rate=args.abort_rate,
+                            hash_tokens=args.hash_tokens,
+                            type_totals=totals,
+                        )
+                    for doc_type, count in excluded.items():
+                        counter.add_skipped(doc_type, count)
+            finally:
+                if state is not None:
+                    state.close()
+                if capture is not None:
+                    capture.close()
+
+        write_stats_file(stats_path_for(output_file_path), counter)
+        counter.timer.log_summary()
+        log_summary(counter.stats)
+        if sampling:
+            log_failure_estimates(counter)
+        if args.incremental:
+            logger.info(f"Reused from cache: {counter.stats['cached']}")
         logger.info(f"Results written to: {output_file_path}")
 
-    except (oracledb.Error, psycopg2.Error) as e:
+    except database_errors as e:
         logger.critical(f"Database Error: {e}")
     except Exception as e:
         logger.critical(f"General Error: {e}", exc_info=True)
@@ -0,0 +1,119 @@
+import csv
+import heapq
+import logging
+import os
+import re
+
+from config import DOK_ID_NUMERIC
+from results import read_parquet_report
+from stats import DocCounter, read_stats_file, stats_path_for, write_stats_file
+
+logger = logging.getLogger("validator")
+
+SHARD_PATTERN = re.compile(r"_shard_(\d+)of(\d+)(?=\.(csv|parquet)$)")
+
+
+def merged_path_for(shard_path):
+    """
+    Returns the report name of the unsharded run, e.g. *_all.csv. The merged
+    report is always a CSV, also for Parquet shards.
+    """
+    root, _ = os.path.splitext(SHARD_PATTERN.sub("", shard_path))
+    return f"{root}.csv"
+
+
+def check_shard_set(csv_paths):
+    """Warns when the given reports do not form one complete K/N shard set."""
+    found = set()
+    for path in csv_paths:
+        match = SHARD_PATTERN.search(os.path.basename(path))
+        if match:
+            found.add((int(match.group(1)), int(match.group(2))))
+
+    counts = {shard_count for _, shard_count in found}
+    if len(counts) != 1:
+        logger.warning("Reports do not share a single shard count N.")
+        return
+
+    shard_count = counts.pop()
+    missing = set(range(shard_count)) - {shard for shard, _ in found}
+    if missing:
+        logger.warning(f"Missing shards of {shard_count}: {sorted(missing)}")
+
+
+def read_report(path):
+    """Yields the data rows of a CSV (or Parquet) report, header skipped."""
+    if path.endswith(".parquet"):
+        yield from read_parquet_report(path)
+        return
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        yield from reader
+
+
+def doc_id_key(doc_id):
+    """
+    Sort key of a report doc_id that matches the query's ORDER BY t.DOK_ID:
+    numeric with DOK_ID_NUMERIC, so "9" comes before "10", else the text.
+    """
+    if not DOK_ID_NUMERIC:
+        return doc_id
+    try:
+        return int(doc_id)
+    except ValueError:
+        raise ValueError(
+            f"DOK_ID {doc_id!r} is not numeric, "
+            "set DOK_ID_NUMERIC = False in config.py."
+        )
+
+
+def ordered_rows(path):
+    """Yields the rows of a report, checking they are ordered by DOK_ID."""
+    previous = None
+    for row in read_report(path):
+        key = doc_id_key(row[0])
+        if previous is not None and key <= previous:
+            raise ValueError(
+                f"{path} is not ordered by DOK_ID ({row[0]} after {previous}), "
+                "check DOK_ID_NUMERIC in config.py."
+            )
+        previous = key
+        yield row
+
+
+def merge_shards(csv_paths, output_path=None):
+    """
+    Combines the CSV (or Parquet) reports and stats files of several shards
+    into one CSV report.
+
+    Every shard is ordered by DOK_ID, so the rows are merged (not concatenated)
+    into a single DOK_ID ordered report, just like an unsharded run. A shard
+    that is not in that order (see `doc_id_key`) raises ValueError.
+
+    Returns:
+        tuple: (output_path, merged DocCounter)
+    """
+    check_shard_set(csv_paths)
+    output_path = output_path or merged_path_for(csv_paths[0])
+    inputs = {os.path.abspath(path) for path in csv_paths}
+    if os.path.abspath(output_path) in inputs:
+        raise ValueError(f"Merge output {output_path} is one of the input reports.")
+
+    with open(output_path, mode="w", newline="", encoding="utf-8-sig") as f:
+        csv_writer = csv.writer(f)
+        csv_writer.writerow(
+            ["doc_id", "doc_type", "table", "status", "loss", "url", "missing"]
+        )
+        readers = [ordered_rows(path) for path in csv_paths]
+        csv_writer.writerows(
+            heapq.merge(*readers, key=lambda row: doc_id_key(row[0]))
+        )
+
+    counter = DocCounter()
+    for path in csv_paths:
+        counter.merge(read_stats_file(stats_path_for(path)))
+    write_stats_file(stats_path_for(output_path), counter)
+
+    return output_path, counter
@@ -0,0 +1,155 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+
+from config import PG_POOL_SIZE, PG_RECONNECT_ATTEMPTS, TYPE_CONFIG
+
+logger = logging.getLogger("validator")
+
+# One prepared lookup per TYPE_CONFIG table, named after its position.
+STATEMENT_NAMES = {
+    table: f"fass_lookup_{i}"
+    for i, table in enumerate(sorted({c["table"] for c in TYPE_CONFIG.values()}))
+}
+
+
+def array_literal(values):
+    """
+    Formats ids as a Postgres array literal. Sent as an untyped string, it is
+    cast to the array type of the id column, so numeric and text ids both work.
+    """
+    items = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return "{" + ",".join(f'"{item}"' for item in items) + "}"
+
+
+class PostgresPool:
+    """
+    Small pool of read-only Postgres connections shared by the lookup threads.
+
+    Each connection prepares the content lookup of a table the first time it
+    needs it, so later lookups skip parsing and planning. Connections that
+    dropped (e.g. the SSH tunnel went away) are discarded and the lookup is
+    retried on a fresh connection.
+    """
+
+    def __init__(self, connect, size=PG_POOL_SIZE, attempts=PG_RECONNECT_ATTEMPTS):
+        if size < 1:
+            raise ValueError(f"Postgres pool size must be at least 1, got {size}.")
+        self.connect = connect
+        self.size = size
+        self.attempts = attempts
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+        self.prepared = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(size, "pg-lookup") if size > 1 else None
+
+    def _new_connection(self):
+        conn = self.connect()
+        conn.autocommit = True  # Lookups only read, no transaction to keep open
+        with self.lock:
+            self.prepared[conn] = set()
+        return conn
+
+    def _discard(self, conn):
+        with self.lock:
+            self.prepared.pop(conn, None)
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _checkout(self):
+        self.slots.acquire()
+        try:
+            while True:
+                try:
+                    conn = self.idle.get_nowait()
+                except queue.Empty:
+                    return self._new_connection()
+                if not conn.closed:
+                    return conn
+                self._discard(conn)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def _checkin(self, conn):
+        self.idle.put(conn)
+        self.slots.release()
+
+    def _execute_lookup(self, conn, doc_ids, config):
+        table = config["table"]
+        name = STATEMENT_NAMES[table]
+        with conn.cursor() as cursor:
+            if table not in self.prepared[conn]:
+                cursor.execute(
+                    f"PREPARE {name} AS "
+                    f"SELECT {config['id_col']}, content, {config['link_col']} "
+                    f"FROM {table} WHERE {config['id_col']} = ANY($1)"
+                )
+                self.prepared[conn].add(table)
+            cursor.execute(f"EXECUTE {name} (%s)", (array_literal(doc_ids),))
+            return cursor.fetchall()
+
+    def fetch_contents(self, doc_ids, config):
+        """
+        Fetches content and link ID for several documents of one table.
+
+        Returns:
+            dict: str(doc_id) -> (content, link_id) for every document found.
+        """
+        if not doc_ids:
+            return {}
+
+        for attempt in range(1, self.attempts + 1):
+            conn = self._checkout()
+            try:
+                pg_rows = self._execute_lookup(conn, doc_ids, config)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                self._discard(conn)
+                self.slots.release()
+                if attempt == self.attempts:
+                    raise
+                logger.warning(
+                    f"Postgres connection lost ({e}), reconnecting "
+                    f"(attempt {attempt}/{self.attempts - 1})"
+                )
+                time.sleep(attempt)
+                continue
+            except BaseException:
+                self._discard(conn)
+                self.slots.release()
+                raise
+            self._checkin(conn)
+            break
+
+        found = {}
+        for doc_id, content, link_id in pg_rows:
+            found.setdefault(str(doc_id), (content, link_id))
+        return found
+
+    def map(self, fn, items):
+        """Runs `fn` over `items` on up to `size` connections at once."""
+        if self.executor is None:
+            return map(fn, items)
+        return self.executor.map(fn, items)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+        while True:
+            try:
+                self._discard(self.idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
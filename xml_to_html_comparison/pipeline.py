@@ -0,0 +1,53 @@
+import queue
+import threading
+
+_ITEM, _ERROR, _DONE = range(3)
+
+
+def _put(q, entry, stop):
+    """Blocks until `entry` is queued (backpressure) or the consumer gave up."""
+    while not stop.is_set():
+        try:
+            q.put(entry, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def prefetch(iterable, maxsize, name):
+    """
+    Runs `iterable` in a background thread and yields its items in order.
+
+    Items are handed over through a queue of `maxsize` entries, so a fast
+    producer blocks instead of running ahead of the consumer. Exceptions
+    raised by the producer are re-raised in the consumer. Closing the
+    returned generator (or abandoning it) stops the producer at its next item.
+    """
+    q = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if not _put(q, (_ITEM, item), stop):
+                    return
+        except BaseException as e:
+            _put(q, (_ERROR, e), stop)
+            return
+        _put(q, (_DONE, None), stop)
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            kind, value = q.get()
+            if kind == _DONE:
+                thread.join()
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        stop.set()
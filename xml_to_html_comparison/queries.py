@@ -1,13 +1,156 @@
 import logging
-from config import TYPE_CONFIG, ARTIKEL_TYPES
+import time
+from collections import defaultdict
+
+from config import (TYPE_CONFIG, ARTIKEL_TYPES, IGNORED_TYPES, LOB_CHUNK_SIZE,
+                    ORACLE_ARRAYSIZE, ORACLE_LOBS_AS_STR, ORACLE_MODIFIED_COLUMN,
+                    ORACLE_PREFETCHROWS, SAMPLE_BUCKETS)
 
 logger = logging.getLogger("validator")
 
+# Semi-joins: a document linked to several articles/products is still
+# returned once, so its CLOB crosses the tunnel once.
+HAS_ARTIKEL = """EXISTS (
+            SELECT 1 FROM FASSADMIN.T_DOKUMENT_ARTIKEL da WHERE da.DOK_ID = t.DOK_ID
+        )"""
+HAS_PRODUKT = """EXISTS (
+            SELECT 1 FROM FASSADMIN.T_DOKUMENT_PRODUKT dp WHERE dp.DOK_ID = t.DOK_ID
+        )"""
+
+# Default condition for "ALL"
+ALL_TYPES_CONDITION = f"""
+        (
+            (t.DOKUMENT_TYP IN (7, 32) AND {HAS_ARTIKEL})
+            OR
+            (t.DOKUMENT_TYP NOT IN (7, 32) AND {HAS_PRODUKT})
+        )
+    """
+
+
+def validated_types_sql():
+    """The configured, non-ignored types as an SQL list, e.g. "3, 4, 6"."""
+    types = sorted(t for t in TYPE_CONFIG if t not in IGNORED_TYPES)
+    return ", ".join(map(str, types))
+
+
+def shard_condition(shard_spec, where_condition):
+    shard, shard_count = parse_shard(shard_spec)
+    return f"MOD(ORA_HASH(t.DOK_ID), {shard_count}) = {shard} AND {where_condition}"
+
+
+def sample_hash():
+    # Seeded, so the sample does not line up with the --shard buckets
+    return f"ORA_HASH(t.DOK_ID, {SAMPLE_BUCKETS - 1}, 1)"
+
+
+def sample_condition(args, where_condition):
+    """
+    Restricts the documents to a sample drawn on the server, in every type:
+    with `--sample-rate F` the share F of the DOK_ID hash buckets, with
+    `--sample N` the N documents per type with the lowest DOK_ID hash. Both
+    are stable between runs, so a sampled run can be resumed.
+    """
+    if args.sample_rate:
+        cutoff = round(args.sample_rate * SAMPLE_BUCKETS)
+        return f"{sample_hash()} < {cutoff} AND {where_condition}"
+
+    ranked = (
+        "SELECT t.DOK_ID, ROW_NUMBER() OVER ("
+        f"PARTITION BY t.DOKUMENT_TYP ORDER BY {sample_hash()}, t.DOK_ID"
+        f") AS SAMPLE_RANK FROM FASSADMIN.T_DOKUMENT t WHERE {where_condition}"
+    )
+    return (
+        f"t.DOK_ID IN (SELECT s.DOK_ID FROM ({ranked}) s "
+        f"WHERE s.SAMPLE_RANK <= {args.sample})"
+    )
+
+
+def parse_shard(value):
+    """Parses a "K/N" shard spec into (K, N)."""
+    try:
+        shard, shard_count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected K/N (e.g. 0/4).")
+
+    if shard_count < 1 or not 0 <= shard < shard_count:
+        raise ValueError(f"Invalid shard '{value}', K must be in 0..N-1.")
+    return shard, shard_count
+
+
+def selected_types(args):
+    """The configured types given with `--types`, None when not restricted."""
+    if not args.types:
+        return None
+    target_types = [int(t.strip()) for t in args.types.split(",")]
+    valid_types = [t for t in target_types if t in TYPE_CONFIG]
+    if not valid_types:
+        raise ValueError("No valid document types found in configuration.")
+    return valid_types
+
+
+def document_condition(args, env_name):
+    """
+    The WHERE condition of the document selection (types, shard, sample)
+    without the resume and watch restrictions.
+
+    Returns:
+        tuple: (where_condition, output_filename)
+    """
+    # Only configured types are selected, so no CLOB is fetched just to be
+    # skipped. See `build_excluded_types_query` for the rest.
+    where_condition = (
+        f"t.DOKUMENT_TYP IN ({validated_types_sql()}) AND {ALL_TYPES_CONDITION}"
+    )
+
+    filename = f"oracle_to_pg_compare_{env_name}_all.csv"
+
+    valid_types = selected_types(args)
+    if valid_types:
+        type_list_sql = ", ".join(map(str, valid_types))
+        where_condition = (
+            f"t.DOKUMENT_TYP IN ({type_list_sql}) AND {ALL_TYPES_CONDITION}"
+        )
+
+        type_suffix = "_".join(map(str, valid_types))
+        filename = f"oracle_to_pg_compare_{env_name}_types_{type_suffix}.csv"
+
+        # Optimization
+        has_artikel = any(t in ARTIKEL_TYPES for t in valid_types)
+        has_product = any(t not in ARTIKEL_TYPES for t in valid_types)
+
+        if has_artikel and not has_product:
+            where_condition = f"t.DOKUMENT_TYP IN ({type_list_sql}) AND {HAS_ARTIKEL}"
+        elif has_product and not has_artikel:
+            where_condition = f"t.DOKUMENT_TYP IN ({type_list_sql}) AND {HAS_PRODUKT}"
+
+    if args.shard:
+        shard, shard_count = parse_shard(args.shard)
+        where_condition = shard_condition(args.shard, where_condition)
+        filename = filename.replace(".csv", f"_shard_{shard}of{shard_count}.csv")
+
+    if args.sample or args.sample_rate:
+        if args.sample and args.sample_rate:
+            raise ValueError("Use either --sample or --sample-rate.")
+        if args.sample_rate and not 0 < args.sample_rate <= 1:
+            raise ValueError("--sample-rate must be in (0, 1].")
+        label = args.sample or f"{args.sample_rate:g}"
+        where_condition = sample_condition(args, where_condition)
+        filename = filename.replace(".csv", f"_sample_{label}.csv")
+
+    return where_condition, filename
 
-def build_oracle_query(args, env_name):
+
+def build_oracle_query(args, env_name, after_id=None, watch=False):
     """
     Constructs the Oracle SQL query based on CLI arguments.
 
+    Documents are ordered by DOK_ID so a run can be resumed with keyset
+    pagination: `after_id` restricts the query to DOK_IDs past that point.
+    With `--shard K/N` only the documents hashing into bucket K are selected,
+    with `--sample`/`--sample-rate` a sample per type (see `sample_condition`).
+    With `watch`, only documents modified in the window between the binds
+    :since (exclusive) and :until (inclusive) are selected (see watch.py).
+
     Returns:
         tuple: (sql_query_string, output_filename)
     """
@@ -24,53 +167,162 @@ def build_oracle_query(args, env_name):
         )
 
     # 2. Specific Types or All
-    join_clause = """
-        LEFT JOIN FASSADMIN.T_DOKUMENT_ARTIKEL da ON t.DOK_ID = da.DOK_ID
-        LEFT JOIN FASSADMIN.T_DOKUMENT_PRODUKT dp ON t.DOK_ID = dp.DOK_ID
-    """
+    where_condition, filename = document_condition(args, env_name)
+    if args.types:
+        logger.info(f"Processing ONLY types: {selected_types(args)}")
+    if args.shard:
+        shard, shard_count = parse_shard(args.shard)
+        logger.info(f"Processing shard {shard} of {shard_count}")
+    if args.sample or args.sample_rate:
+        logger.info(f"Sampling documents per type: {args.sample or args.sample_rate:g}")
 
-    # Default condition for "ALL"
-    where_condition = """
-        (
-            (t.DOKUMENT_TYP IN (7, 32) AND da.DOK_ID IS NOT NULL)
-            OR
-            (t.DOKUMENT_TYP NOT IN (7, 32) AND dp.DOK_ID IS NOT NULL)
+    if after_id is not None:
+        logger.info(f"Resuming after Document ID: {after_id}")
+        where_condition = f"t.DOK_ID > '{after_id}' AND {where_condition}"
+
+    if watch:
+        modified = f"t.{ORACLE_MODIFIED_COLUMN}"
+        where_condition = (
+            f"{modified} > :since AND {modified} <= :until AND {where_condition}"
         )
+        filename = filename.replace(".csv", "_watch.csv")
+
+    return (
+        f"{select_clause} WHERE {where_condition} ORDER BY t.DOK_ID",
+        filename,
+    )
+
+
+def build_type_totals_query(args, env_name):
     """
+    Metadata-only counterpart of the document query: counts the selected
+    documents per type up front, for the progress ETA (see
+    `DocCounter.log_progress`), without touching their content.
 
-    filename = f"oracle_to_pg_compare_{env_name}_all.csv"
+    Not restricted by `after_id`, like `build_excluded_types_query`: a
+    resumed run carries over the counts of the documents already handled.
 
-    if args.types:
-        target_types = [int(t.strip()) for t in args.types.split(",")]
-        valid_types = [t for t in target_types if t in TYPE_CONFIG]
+    Returns:
+        str | None: The query, or None for a single document.
+    """
+    if args.doc_id:
+        return None
 
-        if not valid_types:
-            raise ValueError("No valid document types found in configuration.")
+    where_condition, _ = document_condition(args, env_name)
+    return (
+        "SELECT t.DOKUMENT_TYP, COUNT(*) "
+        f"FROM FASSADMIN.T_DOKUMENT t WHERE {where_condition} "
+        "GROUP BY t.DOKUMENT_TYP"
+    )
 
-        logger.info(f"Processing ONLY types: {valid_types}")
 
-        type_list_sql = ", ".join(map(str, valid_types))
-        where_condition = f"t.DOKUMENT_TYP IN ({type_list_sql}) AND {where_condition}"
+def build_excluded_types_query(args):
+    """
+    Metadata-only counterpart of the "ALL" query: counts the documents of
+    ignored and unknown types per type, with an example name, without
+    touching their content.
 
-        type_suffix = "_".join(map(str, valid_types))
-        filename = f"oracle_to_pg_compare_{env_name}_types_{type_suffix}.csv"
+    Not restricted by `after_id`: the counts are added once per run (see
+    `DocCounter.add_skipped`), so a resumed run still reports all of them.
 
-        # Optimization
-        has_artikel = any(t in ARTIKEL_TYPES for t in valid_types)
-        has_product = any(t not in ARTIKEL_TYPES for t in valid_types)
+    Returns:
+        str | None: The query, or None when only configured types are selected.
+    """
+    if args.doc_id or args.types:
+        return None
 
-        if has_artikel and not has_product:
-            join_clause = "JOIN FASSADMIN.T_DOKUMENT_ARTIKEL da ON t.DOK_ID = da.DOK_ID"
-            where_condition = f"t.DOKUMENT_TYP IN ({type_list_sql})"
-        elif has_product and not has_artikel:
-            join_clause = "JOIN FASSADMIN.T_DOKUMENT_PRODUKT dp ON t.DOK_ID = dp.DOK_ID"
-            where_condition = f"t.DOKUMENT_TYP IN ({type_list_sql})"
+    where_condition = (
+        f"t.DOKUMENT_TYP NOT IN ({validated_types_sql()}) AND {ALL_TYPES_CONDITION}"
+    )
+    if args.shard:
+        where_condition = shard_condition(args.shard, where_condition)
+
+    return (
+        "SELECT t.DOKUMENT_TYP, COUNT(*), MIN(t.NAMN) "
+        f"FROM FASSADMIN.T_DOKUMENT t WHERE {where_condition} "
+        "GROUP BY t.DOKUMENT_TYP"
+    )
+
+
+def fetch_postgres_batch(store, rows, timer=None):
+    """
+    Resolves the Postgres content of an Oracle batch with one query per table.
+    The tables are looked up concurrently as far as the content `store`
+    allows (see sources.py); `PostgresPool` uses one connection per table.
+    With a `StageTimer`, each query is recorded as pg_lookup for its type.
+
+    Returns:
+        dict: (table, str(doc_id)) -> (content, link_id)
+    """
+    doc_types = {}
+    ids_by_table = defaultdict(list)
+    for row in rows:
+        config = TYPE_CONFIG.get(row[1])
+        if config:
+            doc_types[config["table"]] = row[1]
+            ids_by_table[config["table"]].append(row[0])
+
+    def lookup(table):
+        started = time.perf_counter()
+        config = TYPE_CONFIG[doc_types[table]]
+        pg_rows = store.fetch_contents(ids_by_table[table], config)
+        return table, pg_rows, time.perf_counter() - started
+
+    found = {}
+    for table, pg_rows, seconds in store.map(lookup, list(ids_by_table)):
+        for doc_id, pg_row in pg_rows.items():
+            found[(table, doc_id)] = pg_row
+        if timer is not None:
+            timer.add("pg_lookup", seconds, doc_types[table])
+    return found
+
+
+def fetch_lobs_as_str(cursor, metadata):
+    """Output type handler returning CLOBs inline as str instead of LOB locators."""
+    import oracledb  # Not at module level, so --replay needs no driver
+
+    if metadata.type_code in (oracledb.DB_TYPE_CLOB, oracledb.DB_TYPE_NCLOB):
+        return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+
+
+def configure_oracle_cursor(
+    ora_cursor,
+    arraysize=ORACLE_ARRAYSIZE,
+    prefetchrows=ORACLE_PREFETCHROWS,
+    lobs_as_str=ORACLE_LOBS_AS_STR,
+):
+    """
+    Applies the fetch tuning to a cursor; must be called before `execute`.
+
+    `arraysize` is the number of rows per fetch round-trip, `prefetchrows`
+    the rows returned with the execute itself. With `lobs_as_str` the CLOB
+    content comes with the rows, which saves one round-trip per document
+    but keeps every CLOB of a fetch in memory.
+    """
+    ora_cursor.arraysize = arraysize
+    ora_cursor.prefetchrows = prefetchrows
+    if lobs_as_str:
+        ora_cursor.outputtypehandler = fetch_lobs_as_str
+    return ora_cursor
+
+
+class LobChunks:
+    """Reads an Oracle LOB piecewise instead of materializing it with read()."""
 
-    return f"{select_clause} {join_clause} WHERE {where_condition}", filename
+    def __init__(self, lob, chunk_size=LOB_CHUNK_SIZE):
+        self.lob = lob
+        self.chunk_size = chunk_size
+        self.chars_read = 0
 
+    def __bool__(self):
+        return self.lob.size() > 0
 
-def fetch_postgres_content(pg_cursor, doc_id, config):
-    """Fetches content and link ID from Postgres for a specific document."""
-    pg_sql = f"SELECT content, {config['link_col']} FROM {config['table']} WHERE {config['id_col']} = %s"
-    pg_cursor.execute(pg_sql, (doc_id,))
-    return pg_cursor.fetchone()
+    def __iter__(self):
+        offset = 1  # LOB offsets are 1-based and counted in characters
+        while True:
+            chunk = self.lob.read(offset, self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+            offset += len(chunk)
+            self.chars_read += len(chunk)
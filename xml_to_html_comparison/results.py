@@ -0,0 +1,167 @@
+"""
+Columnar result reports (`--output-format parquet`).
+
+The CSV report is made for reading in a spreadsheet: the loss is a decimal
+comma string and the missing words are joined into one cell. The Parquet
+report holds the same rows with typed columns instead, for loading into
+pandas, DuckDB or Spark. pyarrow is only needed for this output format.
+"""
+
+import os
+
+from config import PARQUET_ROW_GROUP_SIZE
+
+
+def parquet_path_for(csv_path):
+    """Returns the Parquet report that replaces an output CSV."""
+    root, _ = os.path.splitext(csv_path)
+    return f"{root}.parquet"
+
+
+def read_parquet_report(path):
+    """
+    Yields the rows of a Parquet report in CSV report form, one record batch
+    at a time, so the CSV tools (merge, diff) read both formats.
+    """
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches():
+        for row in batch.to_pylist():
+            loss, msg = row["loss"], row["message"] or ""
+            if row["status"] == "FAIL":
+                msg = ", ".join(row["missing"])
+            yield [
+                row["doc_id"],
+                str(row["doc_type"]),
+                row["table"],
+                row["status"],
+                "" if loss is None else str(loss).replace(".", ","),
+                row["url"] or "",
+                msg,
+            ]
+
+
+class CsvResultWriter:
+    """
+    Writes result rows to a CSV report through a `csv.writer`: the loss with
+    a decimal comma and the missing words joined into the message column.
+    """
+
+    def __init__(self, csv_writer):
+        self.csv_writer = csv_writer
+
+    def write_result(
+        self,
+        doc_id,
+        doc_type,
+        table_short,
+        status,
+        loss="",
+        url="",
+        msg="",
+        missing=None,
+    ):
+        """Writes one report row; `missing` words replace the message."""
+        if missing is not None:
+            msg = ", ".join(missing)
+        self.csv_writer.writerow(
+            [doc_id, doc_type, table_short, status, str(loss).replace(".", ","), url, msg]
+        )
+
+
+class ParquetResultWriter:
+    """
+    Writes result rows to a Parquet file. Rows are buffered per column and
+    flushed as one row group every `row_group_size` rows, so memory stays
+    bounded however many documents fail.
+
+    Columns: doc_id, doc_type (int32), table and status (dictionary encoded),
+    loss (float64, null unless FAIL), url, missing (list of missing words)
+    and message (the MISSING_IN_PG/ERROR text).
+    """
+
+    COLUMNS = (
+        "doc_id",
+        "doc_type",
+        "table",
+        "status",
+        "loss",
+        "url",
+        "missing",
+        "message",
+    )
+
+    def __init__(self, path, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "The parquet output format needs pyarrow (pip install pyarrow)."
+            ) from e
+
+        self.pa = pa
+        self.schema = pa.schema(
+            [
+                ("doc_id", pa.string()),
+                ("doc_type", pa.int32()),
+                ("table", pa.dictionary(pa.int8(), pa.string())),
+                ("status", pa.dictionary(pa.int8(), pa.string())),
+                ("loss", pa.float64()),
+                ("url", pa.string()),
+                ("missing", pa.list_(pa.string())),
+                ("message", pa.string()),
+            ]
+        )
+        self.path = path
+        self.row_group_size = row_group_size
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.buffer = {column: [] for column in self.COLUMNS}
+        self.rows = 0
+
+    def write_result(
+        self,
+        doc_id,
+        doc_type,
+        table_short,
+        status,
+        loss="",
+        url="",
+        msg="",
+        missing=None,
+    ):
+        """Same arguments as `CsvResultWriter.write_result`, `missing` kept a list."""
+        row = (
+            str(doc_id),
+            doc_type,
+            table_short,
+            status,
+            None if loss == "" else loss,
+            url or None,
+            list(missing or []),
+            msg or None,
+        )
+        for column, value in zip(self.COLUMNS, row):
+            self.buffer[column].append(value)
+        if len(self.buffer["doc_id"]) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows as one row group."""
+        count = len(self.buffer["doc_id"])
+        if not count:
+            return
+        table = self.pa.Table.from_pydict(self.buffer, schema=self.schema)
+        self.writer.write_table(table, row_group_size=count)
+        self.rows += count
+        self.buffer = {column: [] for column in self.COLUMNS}
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
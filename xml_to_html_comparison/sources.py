@@ -0,0 +1,147 @@
+"""
+Document sources and rendered content stores.
+
+A document source runs the T_DOKUMENT queries of queries.py and returns a
+cursor to `fetchmany` from. A content store resolves the rendered HTML per
+Postgres table with `fetch_contents` and runs lookups with `map` (see
+`PostgresPool`). Besides Oracle and Postgres, both have an SQLite stand-in
+(filled by fixtures.py) that runs the same SQL, so the whole loop can be
+run and load tested without the tunnels.
+"""
+
+import datetime
+import functools
+import operator
+import sqlite3
+import zlib
+
+from queries import configure_oracle_cursor
+
+
+class OracleSource:
+    """FASSADMIN.T_DOKUMENT on Oracle, with the fetch tuning of the CLI."""
+
+    def __init__(self, ora_conf, arraysize, prefetchrows, lobs_as_str):
+        import oracledb
+
+        self.conn = oracledb.connect(
+            user=ora_conf["USER"],
+            password=ora_conf["PASS"],
+            dsn=ora_conf["DSN"],
+        )
+        self.cursor_settings = (arraysize, prefetchrows, lobs_as_str)
+
+    def execute(self, query, params=None):
+        cursor = configure_oracle_cursor(self.conn.cursor(), *self.cursor_settings)
+        cursor.execute(query, params or {})
+        return cursor
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def ora_hash(value, max_bucket=0xFFFFFFFF, seed=0):
+    """Stand-in for ORA_HASH: stable, but not the same buckets as Oracle."""
+    return zlib.crc32(str(value).encode("utf-8"), seed) % (max_bucket + 1)
+
+
+class SqliteSource(OracleSource):
+    """
+    Stand-in for the Oracle source on a fixture file. The file is attached as
+    schema FASSADMIN and ORA_HASH/MOD are provided, so the generated Oracle
+    queries run unchanged.
+    """
+
+    def __init__(self, path):
+        # Fetched from the Oracle reader thread with --pipeline
+        self.conn = sqlite3.connect(":memory:", uri=True, check_same_thread=False)
+        self.conn.execute("ATTACH DATABASE ? AS FASSADMIN", (f"file:{path}?mode=ro",))
+        self.conn.create_function("ORA_HASH", -1, ora_hash, deterministic=True)
+        self.conn.create_function("MOD", 2, operator.mod, deterministic=True)
+
+    def execute(self, query, params=None):
+        # Timestamps are stored as ISO text, like the fixtures write them
+        params = dict(params or {})
+        for name, value in params.items():
+            if isinstance(value, datetime.datetime):
+                params[name] = value.isoformat(" ")
+        return self.conn.execute(query, params)
+
+
+class SqliteContentStore:
+    """
+    Stand-in for the Postgres content store on a fixture file: one table per
+    TYPE_CONFIG table, named like it (e.g. "fasssmpc.t_fass_smpc").
+    """
+
+    def __init__(self, path):
+        # Lookups run in the resolver thread with --pipeline
+        self.conn = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+
+    def fetch_contents(self, doc_ids, config):
+        """Same contract as `PostgresPool.fetch_contents`."""
+        found = {}
+        for start in range(0, len(doc_ids), 500):
+            chunk = [str(doc_id) for doc_id in doc_ids[start : start + 500]]
+            rows = self.conn.execute(
+                f"SELECT {config['id_col']}, content, {config['link_col']} "
+                f'FROM "{config["table"]}" '
+                f"WHERE {config['id_col']} IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            for doc_id, content, link_id in rows:
+                found.setdefault(str(doc_id), (content, link_id))
+        return found
+
+    def map(self, fn, items):
+        return map(fn, items)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_sources(args, env_config):
+    """
+    Opens the document source and content store of a run: the SQLite
+    stand-in with `--standin`, otherwise Oracle and a Postgres pool.
+
+    Returns:
+        tuple: (source, store)
+    """
+    if args.standin:
+        return SqliteSource(args.standin), SqliteContentStore(args.standin)
+
+    import psycopg2
+
+    from pg_pool import PostgresPool
+
+    source = OracleSource(
+        env_config["ORA"], args.arraysize, args.prefetchrows, args.fetch_lobs_as_str
+    )
+    pg_conf = env_config["PG"]
+    store = PostgresPool(
+        functools.partial(
+            psycopg2.connect,
+            dbname=pg_conf["DB"],
+            user=pg_conf["USER"],
+            password=pg_conf["PASS"],
+            host=pg_conf["HOST"],
+            port=pg_conf["PORT"],
+        ),
+        args.pg_pool_size,
+    )
+    return source, store
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import sqlite3
+
+import validation
+from config import GLOBAL_IGNORE_TAGS
+
+DEFAULT_STATE_FILE = "validator_state.sqlite"
+
+
+def content_digest(text):
+    """Returns a short, stable digest of a content string."""
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).hexdigest()
+
+
+def config_signature(threshold, type_specific_ignores):
+    """
+    Serializes the validation settings that influence a verdict: the
+    threshold, the ignored tags, the selected HTML backend and the version
+    of the validation logic.
+    """
+    ignores = list(GLOBAL_IGNORE_TAGS) + list(type_specific_ignores or [])
+    return json.dumps(
+        {
+            "threshold": threshold,
+            "ignore_tags": ignores,
+            "html_backend": validation.HTML_BACKEND,
+            "version": validation.VALIDATION_VERSION,
+        }
+    )
+
+
+class ValidationState:
+    """
+    Local SQLite store of the last verdict per (env, DOK_ID).
+
+    A verdict is reused only when both content digests and the config
+    signature are identical to the ones it was computed from.
+    """
+
+    def __init__(self, path, env_name):
+        self.env_name = env_name
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS verdicts (
+                env TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                oracle_digest TEXT NOT NULL,
+                pg_digest TEXT NOT NULL,
+                config TEXT NOT NULL,
+                result TEXT,
+                PRIMARY KEY (env, doc_id)
+            )
+            """
+        )
+
+    def lookup(self, doc_id, oracle_digest, pg_digest, config):
+        """
+        Returns:
+            tuple: (hit, result). `result` is the cached `validate_content`
+            output (may be None) and only meaningful when `hit` is True.
+        """
+        row = self.conn.execute(
+            "SELECT oracle_digest, pg_digest, config, result FROM verdicts "
+            "WHERE env = ? AND doc_id = ?",
+            (self.env_name, str(doc_id)),
+        ).fetchone()
+
+        if row is None or row[:3] != (oracle_digest, pg_digest, config):
+            return False, None
+        return True, json.loads(row[3])
+
+    def store(self, doc_id, oracle_digest, pg_digest, config, result):
+        """Records the verdict of a freshly validated document."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                self.env_name,
+                str(doc_id),
+                oracle_digest,
+                pg_digest,
+                config,
+                json.dumps(result),
+            ),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,335 @@
+import json
+import logging
+import math
+import time
+from array import array
+from collections import Counter, defaultdict, deque
+
+from config import PROGRESS_INTERVAL, PROGRESS_WINDOW
+
+logger = logging.getLogger("validator")
+
+
+def format_duration(seconds):
+    """Formats seconds as e.g. "2h05m", "4m10s" or "12s"."""
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class DocCounter:
+    """Tracks document statistics by type."""
+    def __init__(self):
+        self.total_by_type = Counter()
+        self.processed_by_type = Counter()
+        # Documents selected per type, counted up front (see `set_expected`)
+        self.expected_by_type = Counter()
+        # Validated (SUCCESS or FAIL) and failed documents, for failure rates
+        self.validated_by_type = Counter()
+        self.failed_by_type = Counter()
+        # Not validated because the type's circuit breaker opened
+        self.aborted_by_type = Counter()
+        self.stats = {
+            "processed": 0,
+            "failures": 0,
+            "skipped": 0,
+            "cached": 0,
+            "aborted": 0,
+        }
+        self.timer = StageTimer()
+        self.content_chars = {"clob": 0, "html": 0}
+        self.reset_progress()
+
+    def reset_progress(self, now=None):
+        """
+        Starts the throughput measurement: `progress` holds snapshots
+        (time, processed_by_type, content_chars) of the last PROGRESS_WINDOW
+        seconds, the first one being the start of this run.
+        """
+        now = time.monotonic() if now is None else now
+        self.started = (
+            now, Counter(self.processed_by_type), dict(self.content_chars)
+        )
+        self.progress = deque([self.started])
+        self.logged_at = now
+
+    def snapshot(self):
+        """Returns the counter state as a JSON-serializable dict."""
+        return {
+            "total_by_type": dict(self.total_by_type),
+            "processed_by_type": dict(self.processed_by_type),
+            "validated_by_type": dict(self.validated_by_type),
+            "failed_by_type": dict(self.failed_by_type),
+            "aborted_by_type": dict(self.aborted_by_type),
+            "stats": dict(self.stats),
+        }
+
+    def restore(self, snapshot):
+        """Restores a state produced by `snapshot` (JSON turns type keys into str)."""
+        self.total_by_type = Counter(
+            {int(k): v for k, v in snapshot["total_by_type"].items()}
+        )
+        self.processed_by_type = Counter(
+            {int(k): v for k, v in snapshot["processed_by_type"].items()}
+        )
+        # Missing in checkpoints and stats files of older versions
+        self.validated_by_type = Counter(
+            {int(k): v for k, v in snapshot.get("validated_by_type", {}).items()}
+        )
+        self.failed_by_type = Counter(
+            {int(k): v for k, v in snapshot.get("failed_by_type", {}).items()}
+        )
+        self.aborted_by_type = Counter(
+            {int(k): v for k, v in snapshot.get("aborted_by_type", {}).items()}
+        )
+        self.stats.update(snapshot["stats"])
+        self.reset_progress()
+
+    def set_expected(self, totals):
+        """Sets the per-type document counts of the whole run, for the ETA."""
+        self.expected_by_type = Counter(totals)
+
+    def register_batch(self, rows):
+        """Pre-scans a batch to update total counts."""
+        for row in rows:
+            try:
+                doc_type = row[1]
+                self.total_by_type[doc_type] += 1
+            except IndexError:
+                continue
+
+    def update(self, doc_type, status, clob_chars=0, html_chars=0):
+        """Updates progress for a specific document and its content size."""
+        self.processed_by_type[doc_type] += 1
+        self.content_chars["clob"] += clob_chars
+        self.content_chars["html"] += html_chars
+
+        if status == "SUCCESS":
+            self.stats["processed"] += 1
+            self.validated_by_type[doc_type] += 1
+        elif status == "FAIL":
+            self.stats["failures"] += 1
+            self.stats["processed"] += 1
+            self.validated_by_type[doc_type] += 1
+            self.failed_by_type[doc_type] += 1
+        elif status == "SKIPPED":
+            self.stats["skipped"] += 1
+        elif status == "ABORTED":
+            self.stats["aborted"] += 1
+            self.aborted_by_type[doc_type] += 1
+
+    def add_skipped(self, doc_type, count):
+        """Counts documents that were left out by the query as skipped."""
+        self.total_by_type[doc_type] += count
+        self.processed_by_type[doc_type] += count
+        self.stats["skipped"] += count
+
+    def log_progress(self, now=None):
+        """
+        Logs throughput and progress per document type every PROGRESS_INTERVAL
+        seconds: docs/sec over the moving PROGRESS_WINDOW and since the start,
+        content characters per second and, with expected totals (see
+        `set_expected`), an ETA per active type. Without them only the types
+        handled in the window are listed, with their rate.
+        """
+        now = time.monotonic() if now is None else now
+        if now - self.logged_at < PROGRESS_INTERVAL:
+            return
+        self.logged_at = now
+
+        window = self.progress
+        while len(window) > 1 and now - window[1][0] >= PROGRESS_WINDOW:
+            window.popleft()
+        since, processed_then, chars_then = window[0]
+        window.append(
+            (now, Counter(self.processed_by_type), dict(self.content_chars))
+        )
+
+        elapsed = max(now - since, 1e-9)
+        handled = sum(self.processed_by_type.values())
+        window_rate = (handled - sum(processed_then.values())) / elapsed
+        started_at, processed_at_start, _ = self.started
+        overall_rate = (handled - sum(processed_at_start.values())) / max(
+            now - started_at, 1e-9
+        )
+        clob_rate = (self.content_chars["clob"] - chars_then["clob"]) / elapsed
+        html_rate = (self.content_chars["html"] - chars_then["html"]) / elapsed
+
+        logger.info(
+            f"--- Progress: {handled} docs handled "
+            f"({self.stats['processed']} validated) | "
+            f"{window_rate:.1f} docs/s (last {format_duration(elapsed)}), "
+            f"{overall_rate:.1f} docs/s overall | "
+            f"CLOB {clob_rate / 1e6:.2f}M chars/s, "
+            f"HTML {html_rate / 1e6:.2f}M chars/s ---"
+        )
+        for dtype in sorted(self.expected_by_type or self.processed_by_type):
+            processed = self.processed_by_type[dtype]
+            rate = (processed - processed_then[dtype]) / elapsed
+            if not self.expected_by_type:
+                if rate > 0:
+                    logger.info(f"   Type {dtype}: {processed} done | {rate:.1f} docs/s")
+                continue
+
+            total = self.expected_by_type[dtype]
+            remaining = total - processed
+            if remaining > 0: # Only show active types
+                eta = format_duration(remaining / rate) if rate > 0 else "unknown"
+                logger.info(
+                    f"   Type {dtype}: {processed}/{total} done ({remaining} remaining) "
+                    f"| {rate:.1f} docs/s | ETA {eta}"
+                )
+
+    def merge(self, other):
+        """Adds the counts and stage timings of another DocCounter (e.g. a shard)."""
+        self.total_by_type.update(other.total_by_type)
+        self.processed_by_type.update(other.processed_by_type)
+        self.validated_by_type.update(other.validated_by_type)
+        self.failed_by_type.update(other.failed_by_type)
+        self.aborted_by_type.update(other.aborted_by_type)
+        for key, value in other.stats.items():
+            self.stats[key] = self.stats.get(key, 0) + value
+        self.timer.merge(other.timer)
+
+
+def failure_rate_interval(failures, validated, z=1.96):
+    """
+    Estimated failure rate of a sample with its Wilson score interval (95%
+    for the default `z`), which stays inside [0, 1] for small samples and
+    rates near 0.
+
+    Returns:
+        tuple: (rate, low, high)
+    """
+    rate = failures / validated
+    denominator = 1 + z * z / validated
+    center = (rate + z * z / (2 * validated)) / denominator
+    margin = (
+        z
+        * math.sqrt(rate * (1 - rate) / validated + z * z / (4 * validated**2))
+        / denominator
+    )
+    return rate, max(0.0, center - margin), min(1.0, center + margin)
+
+
+def log_failure_estimates(counter):
+    """Logs the estimated failure rate per type of a sampled run."""
+    logger.info("--- Estimated failure rate per type (95% confidence) ---")
+    for doc_type in sorted(counter.validated_by_type):
+        validated = counter.validated_by_type[doc_type]
+        failures = counter.failed_by_type[doc_type]
+        rate, low, high = failure_rate_interval(failures, validated)
+        logger.info(
+            f"   Type {doc_type:>3}: {rate:7.2%} [{low:.2%} - {high:.2%}] "
+            f"({failures}/{validated} sampled documents failed)"
+        )
+
+
+class StageTimer:
+    """
+    Records wall time per pipeline stage and document type.
+
+    Every sample is kept (in compact float arrays) so the summary can report
+    exact percentiles; stages that are not per document use doc_type None.
+    """
+
+    STAGE_ORDER = [
+        "oracle_fetch",
+        "pg_lookup",
+        "clob_read",
+        "xml_parse",
+        "html_parse",
+        "tokenize",
+        "compare",
+        "csv_write",
+    ]
+
+    def __init__(self):
+        self.samples = defaultdict(lambda: array("d"))
+
+    def add(self, stage, seconds, doc_type=None):
+        self.samples[(stage, doc_type)].append(seconds)
+
+    def merge(self, other):
+        """Adds the samples of another StageTimer (e.g. from another watch poll)."""
+        for key, samples in other.samples.items():
+            self.samples[key].extend(samples)
+
+    def add_all(self, timings, doc_type=None):
+        """Adds a {stage: seconds} dict, e.g. from `validate_content`."""
+        for stage, seconds in timings.items():
+            self.samples[(stage, doc_type)].append(seconds)
+
+    @staticmethod
+    def describe(samples):
+        ordered = sorted(samples)
+        total = math.fsum(ordered)
+        return {
+            "count": len(ordered),
+            "total": total,
+            "mean": total / len(ordered),
+            "p95": ordered[math.ceil(0.95 * len(ordered)) - 1],
+        }
+
+    def stages(self):
+        found = {stage for stage, _ in self.samples}
+        known = [stage for stage in self.STAGE_ORDER if stage in found]
+        return known + sorted(found - set(known))
+
+    def summary(self):
+        """
+        Returns:
+            dict: stage -> {"all": stats, "by_type": {doc_type: stats}} where
+            stats holds count, total, mean and p95 (seconds).
+        """
+        summary = {}
+        for stage in self.stages():
+            combined = array("d")
+            by_type = {}
+            for (sample_stage, doc_type), samples in self.samples.items():
+                if sample_stage != stage:
+                    continue
+                combined.extend(samples)
+                if doc_type is not None:
+                    by_type[str(doc_type)] = self.describe(samples)
+            summary[stage] = {"all": self.describe(combined), "by_type": by_type}
+        return summary
+
+    def log_summary(self):
+        """Logs totals, means and p95 per stage."""
+        summary = self.summary()
+        if not summary:
+            return
+
+        logger.info("--- Stage timings ---")
+        logger.info(f"   {'stage':<14}{'count':>9}{'total':>11}{'mean':>11}{'p95':>11}")
+        for stage, values in summary.items():
+            stats = values["all"]
+            logger.info(
+                f"   {stage:<14}{stats['count']:>9}{stats['total']:>10.1f}s"
+                f"{stats['mean'] * 1000:>9.2f}ms{stats['p95'] * 1000:>9.2f}ms"
+            )
+
+
+def stats_path_for(csv_path):
+    """Returns the stats file that belongs to an output CSV."""
+    return f"{csv_path}.stats.json"
+
+
+def write_stats_file(path, counter):
+    """Writes the final DocCounter state and stage timings next to the CSV report."""
+    data = counter.snapshot()
+    data["timings"] = counter.timer.summary()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def read_stats_file(path):
+    """Loads a stats file written by `write_stats_file` into a DocCounter."""
+    counter = DocCounter()
+    with open(path, encoding="utf-8") as f:
+        counter.restore(json.load(f))
+    return counter
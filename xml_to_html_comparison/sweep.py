@@ -0,0 +1,175 @@
+"""
+Threshold and ignore-tag sweep over a captured corpus (see `--capture`).
+
+Every document is parsed once. Each Oracle token is recorded together with
+the candidate ignore tags enclosing its occurrences, which is enough to
+derive the token set of any combination of those tags without parsing again.
+Every (ignore-tag combination, threshold) pair is then evaluated per type.
+"""
+
+import itertools
+import logging
+from collections import Counter, defaultdict
+
+from lxml import etree as ET
+
+from config import GLOBAL_IGNORE_TAGS, TYPE_CONFIG
+from validation import clean_html_content, get_tokens
+
+logger = logging.getLogger("validator")
+
+DEFAULT_THRESHOLDS = [0.0, 0.01, 0.02, 0.05, 0.1]
+# Every subset of the candidate tags is evaluated, so keep the grid bounded.
+MAX_SWEEP_TAGS = 10
+GLOBAL_BIT = 1
+
+
+def text_segments(oracle_xml, tag_bits):
+    """
+    Yields (text, mask) for every text node `clean_xml_content` joins, where
+    `mask` has the bits of all `tag_bits` tags whose removal drops the node:
+    its enclosing elements and, for a tail, the element it trails.
+    """
+    parser = ET.XMLParser(recover=True)
+    root = ET.fromstring(oracle_xml.encode("utf-8"), parser=parser)
+
+    masks = {root: 0}  # The root itself is never removed
+    if root.text:
+        yield root.text, 0
+    for element in root.iterdescendants():
+        mask = masks[element.getparent()]
+        if isinstance(element.tag, str):
+            mask |= tag_bits.get(element.tag, 0)
+            masks[element] = mask
+            if element.text:
+                yield element.text, mask
+        # Comment and PI text is never extracted, but their tails are
+        if element.tail:
+            yield element.tail, mask
+
+
+def document_profile(oracle_xml, pg_html, candidate_tags):
+    """
+    Parses one document pair and groups its Oracle tokens by where they occur.
+
+    Returns:
+        Counter: (masks, is_missing) -> number of tokens. `masks` holds the
+        candidate-tag masks of a token's occurrences (bit i + 1 is
+        candidate_tags[i]), `is_missing` whether it counts as a missing word.
+        A token is present under an ignore combination `m` if any of its
+        masks has no bit in common with `m`.
+    """
+    tag_bits = {tag: 1 << (i + 1) for i, tag in enumerate(candidate_tags)}
+    for tag in GLOBAL_IGNORE_TAGS:
+        tag_bits[tag] = tag_bits.get(tag, 0) | GLOBAL_BIT
+
+    texts = defaultdict(list)
+    for text, mask in text_segments(oracle_xml, tag_bits):
+        if not mask & GLOBAL_BIT:
+            texts[mask].append(text)
+
+    occurrences = defaultdict(set)
+    for mask, parts in texts.items():
+        for token in get_tokens(" ".join(parts)):
+            occurrences[token].add(mask)
+
+    pg_tokens = get_tokens(clean_html_content(pg_html))
+    profile = Counter()
+    for token, masks in occurrences.items():
+        masks = frozenset([0]) if 0 in masks else frozenset(masks)
+        profile[(masks, len(token) > 2 and token not in pg_tokens)] += 1
+    return profile
+
+
+def profile_loss(profile, ignore_mask):
+    """Loss ratio of a profiled document with the tags of `ignore_mask` removed."""
+    total = missing = 0
+    for (masks, is_missing), count in profile.items():
+        if any(not mask & ignore_mask for mask in masks):
+            total += count
+            if is_missing:
+                missing += count
+    return missing / total if total else None
+
+
+def candidate_tags_for(doc_type, extra_tags):
+    """The type's configured ignore tags plus the extra candidates, in order."""
+    tags = list(TYPE_CONFIG[doc_type].get("ignore_tags", []))
+    tags += [tag for tag in extra_tags if tag not in tags]
+    if len(tags) > MAX_SWEEP_TAGS:
+        raise ValueError(
+            f"Type {doc_type} has {len(tags)} candidate tags, max is {MAX_SWEEP_TAGS}."
+        )
+    return tags
+
+
+def sweep_documents(documents, thresholds, extra_tags=()):
+    """
+    Evaluates every ignore-tag combination and threshold over `documents`,
+    an iterable of (doc_id, doc_type, oracle_xml, pg_html).
+
+    Returns:
+        dict: doc_type -> {"tags": candidate tags, "docs": documents,
+        "failures": {combination: [failures per threshold]}}, where a
+        combination is a tuple of ignored candidate tags.
+    """
+    results = {}
+    for doc_id, doc_type, oracle_xml, pg_html in documents:
+        if doc_type not in results:
+            tags = candidate_tags_for(doc_type, extra_tags)
+            combinations = [
+                combination
+                for size in range(len(tags) + 1)
+                for combination in itertools.combinations(tags, size)
+            ]
+            results[doc_type] = {
+                "tags": tags,
+                "docs": 0,
+                "combinations": combinations,
+                "failures": {c: [0] * len(thresholds) for c in combinations},
+            }
+        result = results[doc_type]
+        result["docs"] += 1
+
+        try:
+            profile = document_profile(oracle_xml, pg_html, result["tags"])
+        except Exception as e:
+            logger.error(f"Sweep exception for Doc ID {doc_id}: {e}")
+            continue
+
+        for combination in result["combinations"]:
+            ignore_mask = 0
+            for tag in combination:
+                ignore_mask |= 1 << (result["tags"].index(tag) + 1)
+            loss = profile_loss(profile, ignore_mask)
+            if loss is None:
+                continue
+            counts = result["failures"][combination]
+            for i, threshold in enumerate(thresholds):
+                if loss > threshold:
+                    counts[i] += 1
+
+    for result in results.values():
+        del result["combinations"]
+    return results
+
+
+def write_sweep_matrix(csv_writer, results, thresholds):
+    """Writes one row per type and ignore combination, one column per threshold."""
+    csv_writer.writerow(
+        ["doc_type", "ignore_tags", "configured", "docs"]
+        + [f"fail_at_{threshold:g}" for threshold in thresholds]
+    )
+    for doc_type in sorted(results):
+        result = results[doc_type]
+        configured = set(TYPE_CONFIG[doc_type].get("ignore_tags", []))
+        for combination, counts in result["failures"].items():
+            csv_writer.writerow(
+                [
+                    doc_type,
+                    "|".join(combination),
+                    "yes" if set(combination) == configured else "",
+                    result["docs"],
+                ]
+                + counts
+            )
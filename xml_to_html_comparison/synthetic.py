@@ -0,0 +1,172 @@
+"""
+Synthetic Oracle XML / Postgres HTML document pairs for benchmarks and
+load tests. Documents are generated per TYPE_CONFIG type with realistic
+sizes and tag mixes, including the global and type specific ignore tags.
+"""
+
+import random
+from xml.sax.saxutils import escape
+
+from config import GLOBAL_IGNORE_TAGS, TYPE_CONFIG
+
+# Approximate XML size (characters) of a typical document per type.
+TYPICAL_SIZES = {
+    3: 60000,  # FASS text
+    4: 40000,  # Veterinary FASS text
+    6: 120000,  # SmPC
+    7: 25000,  # Package leaflet
+    14: 80000,  # Veterinary SmPC
+    32: 20000,  # Veterinary package leaflet
+    78: 15000,  # Environmental information
+    80: 30000,  # Safety data sheet
+}
+DEFAULT_SIZE = 30000
+
+ROOT_TAGS = {
+    3: "fass-document",
+    4: "fass-document",
+    6: "smpc",
+    7: "package-leaflet",
+    14: "smpc",
+    32: "package-leaflet",
+    78: "environmental-information",
+    80: "safety-data-sheet",
+}
+
+VOCABULARY = (
+    "behandling dos dosering tablett tabletter kapsel lösning injektion patient "
+    "patienter barn vuxna äldre njurfunktion leverfunktion biverkningar vanliga "
+    "sällsynta mycket huvudvärk illamående yrsel diarré utslag klåda trötthet "
+    "graviditet amning fertilitet interaktioner överdosering förvaring hållbarhet "
+    "förpackning innehåll hjälpämnen laktos sorbitol natrium kalium magnesium "
+    "farmakokinetik absorption distribution metabolism eliminering halveringstid "
+    "plasmakoncentration clearance kreatinin läkemedel läkare apotekspersonal "
+    "sjuksköterska kontraindikationer varningar försiktighet indikationer effekt "
+    "säkerhet studier placebo kontrollerade randomiserade miljöpåverkan nedbrytning "
+    "bioackumulering toxicitet vattenlevande organismer hantering exponering"
+).split()
+UNITS = ["mg", "g", "µg", "ml", "mg/kg", "mg/m²", "ml/min", "°C", "%", "timmar"]
+LETTERS = "abcdefghijklmnopqrstuvwxyzåäö"
+
+
+def _rare_word(rng):
+    """Substance, product and company names make most of a document's unique words."""
+    return "".join(rng.choices(LETTERS, k=rng.randint(6, 12)))
+
+
+def _sentence(rng):
+    words = rng.choices(VOCABULARY, k=rng.randint(8, 20))
+    for _ in range(rng.randint(0, 3)):
+        words.insert(rng.randrange(len(words)), _rare_word(rng))
+    if rng.random() < 0.4:
+        words.insert(
+            rng.randrange(len(words)), f"{rng.randint(1, 1000)} {rng.choice(UNITS)}"
+        )
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng):
+    return " ".join(_sentence(rng) for _ in range(rng.randint(2, 6)))
+
+
+def _ignored_block(rng, tag):
+    return f"<{tag}>{escape(_paragraph(rng))}</{tag}>"
+
+
+def generate_pair(doc_type, rng, size=None, loss_rate=0.0):
+    """
+    Generates one (oracle_xml, pg_html) pair of roughly `size` XML characters.
+
+    The HTML renders the same text without the ignored tags. With
+    `loss_rate`, that fraction of paragraphs is dropped from the HTML so the
+    pair fails validation like a broken migration would.
+    """
+    config = TYPE_CONFIG.get(doc_type, {})
+    size = size or TYPICAL_SIZES.get(doc_type, DEFAULT_SIZE)
+    ignore_tags = list(GLOBAL_IGNORE_TAGS) + list(config.get("ignore_tags", []))
+    root = ROOT_TAGS.get(doc_type, "document")
+
+    xml_parts = [
+        f'<?xml version="1.0" encoding="UTF-8"?><{root}>',
+        _ignored_block(rng, "meta-data"),
+    ]
+    html_parts = ["<html><body><div class='document'>"]
+    xml_size = 0
+    section = 0
+
+    while xml_size < size:
+        section += 1
+        heading = escape(_sentence(rng))
+        xml_section = [f"<section id='s{section}'><title>{section}. {heading}</title>"]
+        html_section = [f"<h2>{section}. {heading}</h2>"]
+
+        for _ in range(rng.randint(2, 8)):
+            kind = rng.random()
+            if kind < 0.1 and ignore_tags:
+                xml_section.append(_ignored_block(rng, rng.choice(ignore_tags)))
+                continue
+
+            if kind < 0.25:
+                items = [escape(_sentence(rng)) for _ in range(rng.randint(2, 6))]
+                xml_section.append(
+                    "<list>" + "".join(f"<item>{i}</item>" for i in items) + "</list>"
+                )
+                html_block = "<ul>" + "".join(f"<li>{i}</li>" for i in items) + "</ul>"
+            elif kind < 0.35:
+                rows = [
+                    [
+                        escape(rng.choice(VOCABULARY)),
+                        f"{rng.randint(1, 500)} {rng.choice(UNITS)}",
+                    ]
+                    for _ in range(rng.randint(2, 8))
+                ]
+                xml_section.append(
+                    "<table>"
+                    + "".join(
+                        f"<row><cell>{a}</cell><cell>{b}</cell></row>" for a, b in rows
+                    )
+                    + "</table>"
+                )
+                html_block = (
+                    "<table>"
+                    + "".join(f"<tr><td>{a}</td><td>{b}</td></tr>" for a, b in rows)
+                    + "</table>"
+                )
+            else:
+                text = escape(_paragraph(rng))
+                if rng.random() < 0.2:
+                    text += f" C<sub>max</sub> {rng.randint(1, 90)} m<sup>2</sup>"
+                xml_section.append(f"<para>{text}</para>")
+                html_block = f"<p>{text}</p>"
+
+            if rng.random() >= loss_rate:
+                html_section.append(html_block)
+
+        xml_section.append("</section>")
+        chunk = "".join(xml_section)
+        xml_parts.append(chunk)
+        html_parts.extend(html_section)
+        xml_size += len(chunk)
+
+    xml_parts.append(_ignored_block(rng, "audittrail-list"))
+    xml_parts.append(f"</{root}>")
+    html_parts.append("</div></body></html>")
+    return "".join(xml_parts), "".join(html_parts)
+
+
+def generate_corpus(docs_per_type, seed=0, scale=1.0, loss_rate=0.0, doc_types=None):
+    """
+    Yields (doc_id, doc_type, oracle_xml, pg_html) for every configured type.
+
+    Sizes vary around TYPICAL_SIZES (times `scale`) so a corpus contains both
+    small and very large documents.
+    """
+    rng = random.Random(seed)
+    doc_id = 0
+    for doc_type in doc_types or TYPE_CONFIG:
+        typical = TYPICAL_SIZES.get(doc_type, DEFAULT_SIZE) * scale
+        for _ in range(docs_per_type):
+            doc_id += 1
+            size = int(typical * rng.lognormvariate(0, 0.5))
+            oracle_xml, pg_html = generate_pair(doc_type, rng, size, loss_rate)
+            yield str(doc_id), doc_type, oracle_xml, pg_html
@@ -1,36 +1,134 @@
+import heapq
 import logging
 import re
+import time
 import unicodedata
 
 import lxml.etree as ET
+import lxml.html
 from bs4 import BeautifulSoup
-from config import GLOBAL_IGNORE_TAGS
+from config import (GLOBAL_IGNORE_TAGS, HTML_BACKEND, LOB_CHUNK_SIZE,
+                    TOKEN_HASHING, XML_STREAMING)
+
+try:
+    import numpy as np
+except ImportError:  # Only needed for --hash-tokens
+    np = None
 
 logger = logging.getLogger("validator")
 
+# Bump whenever text extraction, tokenization or the loss calculation changes
+# a verdict, so verdicts stored by --incremental from older code are not reused.
+VALIDATION_VERSION = 2
 
-def get_tokens(text):
+# Text inside these elements is not rendered, BeautifulSoup's get_text skips it too.
+NON_TEXT_HTML_TAGS = ("script", "style", "template")
+
+
+# A digit is always a token of its own, any other run of word characters is a word.
+TOKEN_PATTERN = re.compile(r"\d|[^\W\d]+")
+
+# ASCII fast path: lowercases A-Z, keeps a-z and "_", turns everything else into a separator.
+ASCII_TOKEN_TABLE = bytes(
+    c + 32 if 65 <= c <= 90 else c if 97 <= c <= 122 or c == 95 else 32
+    for c in range(256)
+)
+ASCII_DIGITS = "0123456789"
+
+
+def split_words(text):
     """
     Normalizes text (NFKC), removes symbols, separates digits,
-    and returns a set of tokens.
+    and returns the list of tokens in text order (with repeats).
+
+    Single pass over the text: ASCII text (always NFKC-stable) is split with
+    one byte translate, anything else with one precompiled regex scan. In
+    ASCII text every digit that occurs is listed once, at the end.
+    """
+    if not text:
+        return []
+
+    if text.isascii():
+        words = text.encode("ascii").translate(ASCII_TOKEN_TABLE).decode("ascii")
+        words = words.split()
+        words.extend(digit for digit in ASCII_DIGITS if digit in text)
+        return words
+
+    # Normalize unicode characters (e.g., converts '²' to '2')
+    if not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def get_tokens(text):
+    """Returns the set of tokens of a text (see `split_words`)."""
+    return set(split_words(text))
+
+
+def iter_word_chunks(text, chunk_size=65536):
+    """
+    `split_words` of `text` piece by piece, so no list of every word in a
+    large text is built. Pieces end at a space (after NFKC normalization,
+    which can change the length), which never splits a token.
+
+    Yields:
+        list: The tokens of the next piece of roughly `chunk_size` characters.
     """
     if not text:
-        return set()
+        return
+    if not text.isascii() and not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+
+    start = 0
+    while start < len(text):
+        end = text.find(" ", start + chunk_size)
+        if end == -1:
+            end = len(text)
+        yield split_words(text[start:end])
+        start = end + 1
+
+
+def hash_tokens(word_chunks, keep_words=False):
+    """
+    Compact token set for --hash-tokens, built from lists of words (see
+    `iter_word_chunks`): the distinct words longer than 2 characters (the
+    only ones `calculate_loss` reports missing) as a sorted array of 64-bit
+    hashes, plus the number of distinct words of any length. Each list is
+    deduplicated before it is hashed.
 
-    # 1. Normalize unicode characters (e.g., converts '²' to '2')
-    text = unicodedata.normalize("NFKC", text)
-    text = text.lower()
+    With `keep_words`, the distinct long words are also returned, in the
+    order of their hashes, so missing words can be named without
+    tokenizing the text again.
 
-    # 2. Replace non-word/non-whitespace symbols with space
-    clean_text = re.sub(r"[^\w\s]", " ", text)
+    `hash` is salted per process, so both sides of a comparison have to be
+    hashed in the same process, which `validate_content` does.
 
-    # 3. Separate digits from words
-    clean_text = re.sub(r"(\d)", r" \1 ", clean_text)
+    Returns:
+        tuple: (hashes, words or None, token_count)
+    """
+    short_words = set()
+    long_words = {}
+    hashed = []
+    for words in word_chunks:
+        distinct = set(words)
+        short_words.update(word for word in distinct if len(word) <= 2)
+        long = [word for word in distinct if len(word) > 2]
+        if keep_words:
+            long_words.update(dict.fromkeys(long))
+        else:
+            hashed.append(
+                np.fromiter(map(hash, long), dtype=np.int64, count=len(long))
+            )
 
-    # 4. Collapse whitespace
-    clean_text = re.sub(r"\s+", " ", clean_text)
+    if not keep_words:
+        hashes = np.unique(np.concatenate(hashed)) if hashed else np.empty(0, np.int64)
+        return hashes, None, len(hashes) + len(short_words)
 
-    return set(clean_text.split())
+    words = np.array(list(long_words), dtype=object)
+    hashes = np.fromiter(map(hash, words), dtype=np.int64, count=len(words))
+    order = np.argsort(hashes)
+    return hashes[order], words[order], len(words) + len(short_words)
 
 
 def clean_xml_content(oracle_xml, type_specific_ignores=None):
@@ -52,12 +150,164 @@ def clean_xml_content(oracle_xml, type_specific_ignores=None):
     return " ".join(xml_root.itertext())
 
 
-def clean_html_content(postgres_html):
-    """Parses Postgres HTML and extracts text."""
+def iter_text_chunks(text, chunk_size=LOB_CHUNK_SIZE):
+    """Splits a string into chunks for the streaming parser."""
+    for start in range(0, len(text), chunk_size):
+        yield text[start : start + chunk_size]
+
+
+class StreamingXmlTokenizer:
+    """
+    Streaming variant of `clean_xml_content` followed by `get_tokens`.
+
+    XML is fed in chunks to a pull parser. Finished elements are tokenized and
+    cleared (and earlier siblings dropped), so only the open elements are kept
+    in memory. Ignored subtrees are skipped together with their tail, exactly
+    like `parent.remove` in `clean_xml_content`; the root is never ignored.
+    """
+
+    FLUSH_SIZE = 65536  # Buffered characters per get_tokens call
+
+    def __init__(self, type_specific_ignores=None):
+        self.ignores = set(GLOBAL_IGNORE_TAGS) | set(type_specific_ignores or [])
+        self.parser = ET.XMLPullParser(events=("start", "end"), recover=True)
+        self.tokens = set()
+        self.buffer = []
+        self.buffered = 0
+        self.depth = 0
+        self.ignored_depth = 0
+        self.has_root = False
+
+    def feed(self, chunk):
+        self.parser.feed(chunk.encode("utf-8"))
+        self._handle_events()
+
+    def close(self):
+        """Finishes parsing and returns the token set."""
+        self.parser.close()
+        self._handle_events()  # Closes elements left open by broken XML
+        if not self.has_root:
+            raise ValueError("No XML root element found.")
+        self._flush()
+        return self.tokens
+
+    def _handle_events(self):
+        for event, element in self.parser.read_events():
+            if event == "start":
+                parent = element.getparent()
+                if parent is not None:
+                    # Earlier siblings are finished, their tails are complete.
+                    while parent[0] is not element:
+                        self._add_child_tail(parent[0])
+                        del parent[0]
+                    if element.tag in self.ignores:
+                        self.ignored_depth += 1
+                self.depth += 1
+                self.has_root = True
+                continue
+
+            self.depth -= 1
+            if self.ignored_depth == 0:
+                self._add_text(element.text)
+                for child in element:
+                    self._add_child_tail(child)
+            elif self.depth > 0 and element.tag in self.ignores:
+                self.ignored_depth -= 1
+            element.clear(keep_tail=True)
+
+    def _add_child_tail(self, child):
+        if self.ignored_depth == 0 and child.tag not in self.ignores:
+            self._add_text(child.tail)
+
+    def _add_text(self, text):
+        if text:
+            self.buffer.append(text)
+            self.buffered += len(text)
+            if self.buffered >= self.FLUSH_SIZE:
+                self._flush()
+
+    def _flush(self):
+        self.tokens |= get_tokens(" ".join(self.buffer))
+        self.buffer = []
+        self.buffered = 0
+
+
+def stream_xml_tokens(oracle_xml, type_specific_ignores=None):
+    """
+    Tokenizes Oracle XML without building the full tree.
+
+    Args:
+        oracle_xml: A string, or an iterable of string chunks (e.g. a LOB
+            read piecewise) so the whole document is never materialized.
+    """
+    if isinstance(oracle_xml, str):
+        oracle_xml = iter_text_chunks(oracle_xml)
+
+    tokenizer = StreamingXmlTokenizer(type_specific_ignores)
+    for chunk in oracle_xml:
+        tokenizer.feed(chunk)
+    return tokenizer.close()
+
+
+def set_token_hashing(enabled):
+    """Switches `validate_content` between token sets and hashed token arrays."""
+    global TOKEN_HASHING
+    if enabled and np is None:
+        raise ImportError("--hash-tokens needs numpy (pip install numpy).")
+    TOKEN_HASHING = enabled
+
+
+def set_xml_streaming(enabled):
+    """Switches `validate_content` between the tree and the streaming XML parser."""
+    global XML_STREAMING
+    XML_STREAMING = enabled
+
+
+def extract_html_text_lxml(postgres_html):
+    """Extracts text with libxml2's HTML parser (fast default backend)."""
+    # Comments and PIs are kept: removing them at parse time would join the
+    # text around them into one word, and itertext() skips them anyway.
+    parser = lxml.html.HTMLParser(encoding="utf-8")
+    try:
+        html_root = lxml.html.fromstring(postgres_html.encode("utf-8"), parser=parser)
+    except ET.ParserError:  # Whitespace-only or empty document
+        return ""
+    if not isinstance(html_root.tag, str):  # Only a comment or PI, no text
+        return ""
+
+    # Emptied in place rather than stripped, so their tails stay separate
+    # text nodes instead of being joined to the text before them.
+    for element in html_root.iter(*NON_TEXT_HTML_TAGS):
+        element.text = None
+        del element[:]
+    return " ".join(html_root.itertext())
+
+
+def extract_html_text_bs4(postgres_html):
+    """Extracts text with BeautifulSoup's html.parser (reference backend)."""
     soup = BeautifulSoup(postgres_html, "html.parser")
     return soup.get_text(" ")
 
 
+HTML_BACKENDS = {
+    "lxml": extract_html_text_lxml,
+    "bs4": extract_html_text_bs4,
+}
+
+
+def set_html_backend(name):
+    """Selects the HTML text extraction backend used by `clean_html_content`."""
+    global HTML_BACKEND
+    if name not in HTML_BACKENDS:
+        raise ValueError(f"Unknown HTML backend '{name}'.")
+    HTML_BACKEND = name
+
+
+def clean_html_content(postgres_html, backend=None):
+    """Parses Postgres HTML and extracts text."""
+    return HTML_BACKENDS[backend or HTML_BACKEND](postgres_html)
+
+
 def calculate_loss(oracle_tokens, postgres_tokens, threshold):
     """
     Compares token sets and calculates the percentage of missing words.
@@ -77,40 +327,117 @@ def calculate_loss(oracle_tokens, postgres_tokens, threshold):
 
     if logger.isEnabledFor(logging.DEBUG) and missing_words:
         logger.debug(
-            f"Missing words found (Count: {len(missing_words)}): {list(missing_words)}"
+            f"Missing words found (Count: {len(missing_words)}): {sorted(missing_words)}"
         )
 
     if loss_ratio > threshold:
         return {
             "status": "FAIL",
             "loss_raw": loss_ratio,
-            "missing": list(missing_words)[:10],
+            # Sorted, so the reported words do not depend on the string hash
+            # seed of the (worker) process
+            "missing": sorted(missing_words)[:10],
         }
 
     return {"status": "SUCCESS", "loss_raw": loss_ratio}
 
 
-def validate_content(oracle_xml, postgres_html, threshold, type_specific_ignores=None):
-    """Orchestrates the cleaning and validation of two content strings."""
+def calculate_hashed_loss(oracle_tokens, postgres_tokens, threshold):
+    """
+    `calculate_loss` on hashed tokens (see `hash_tokens`). The missing tokens
+    are found with one vectorized binary search of the sorted Oracle hashes
+    in the sorted Postgres hashes. On FAIL the Oracle words kept next to the
+    hashes name the missing ones, the first 10 in sorted order like
+    `calculate_loss`.
+    """
+    oracle_hashes, oracle_words, token_count = oracle_tokens
+    postgres_hashes = postgres_tokens[0]
+    if not token_count:
+        logger.warning("Oracle content resulted in 0 tokens.")
+        return None
+
+    missing = np.ones(len(oracle_hashes), dtype=bool)
+    if len(postgres_hashes):
+        positions = np.searchsorted(postgres_hashes, oracle_hashes)
+        positions = np.minimum(positions, len(postgres_hashes) - 1)
+        missing = postgres_hashes[positions] != oracle_hashes
+
+    loss_ratio = int(np.count_nonzero(missing)) / token_count
+    logger.debug(f"Calculated loss ratio: {loss_ratio:.4f}")
+
+    if loss_ratio > threshold:
+        return {
+            "status": "FAIL",
+            "loss_raw": loss_ratio,
+            "missing": heapq.nsmallest(10, oracle_words[missing].tolist()),
+        }
+
+    return {"status": "SUCCESS", "loss_raw": loss_ratio}
+
+
+def validate_content(
+    oracle_xml, postgres_html, threshold, type_specific_ignores=None, timings=None
+):
+    """
+    Orchestrates the cleaning and validation of two content strings.
+
+    `oracle_xml` may also be an iterable of chunks, which is always parsed
+    with `stream_xml_tokens`. If a `timings` dict is given, the wall time of
+    the xml_parse, html_parse, tokenize and compare stages is stored in it
+    (when streaming, XML tokenizing is part of xml_parse).
+    """
     if not oracle_xml or not postgres_html:
         return {"status": "ERROR", "msg": "Empty content found"}
 
+    timings = {} if timings is None else timings
     try:
-        xml_text = clean_xml_content(oracle_xml, type_specific_ignores)
+        started = time.perf_counter()
+        xml_text = None
+        if XML_STREAMING or not isinstance(oracle_xml, str):
+            oracle_tokens = stream_xml_tokens(oracle_xml, type_specific_ignores)
+        else:
+            xml_text = clean_xml_content(oracle_xml, type_specific_ignores)
+        timings["xml_parse"] = time.perf_counter() - started
+
+        started = time.perf_counter()
         html_text = clean_html_content(postgres_html)
+        timings["html_parse"] = time.perf_counter() - started
 
-        oracle_tokens = get_tokens(xml_text)
-        postgres_tokens = get_tokens(html_text)
-        logger.debug(
-            f"Token counts - Oracle: {len(oracle_tokens)}, Postgres: {len(postgres_tokens)}"
-        )
+        started = time.perf_counter()
+        if TOKEN_HASHING:
+            oracle_words = [oracle_tokens] if xml_text is None else None
+            oracle_tokens = hash_tokens(
+                oracle_words or iter_word_chunks(xml_text), keep_words=True
+            )
+            postgres_tokens = hash_tokens(iter_word_chunks(html_text))
+        else:
+            if xml_text is not None:
+                oracle_tokens = get_tokens(xml_text)
+            postgres_tokens = get_tokens(html_text)
+        timings["tokenize"] = time.perf_counter() - started
+
+        if TOKEN_HASHING:
+            # Only hashes are kept, there are no words to trace
+            logger.debug(
+                f"Token counts - Oracle: {oracle_tokens[2]}, Postgres: {postgres_tokens[2]}"
+            )
+        else:
+            logger.debug(
+                f"Token counts - Oracle: {len(oracle_tokens)}, Postgres: {len(postgres_tokens)}"
+            )
 
-        if logger.isEnabledFor(logging.DEBUG):
+        if logger.isEnabledFor(logging.DEBUG) and not TOKEN_HASHING:
             logger.debug(
                 f"\n--- TOKEN TRACE ---\nORACLE: {str(oracle_tokens)[:200]}...\nPOSTGRES: {str(postgres_tokens)[:200]}...\n"
             )
 
-        return calculate_loss(oracle_tokens, postgres_tokens, threshold)
+        started = time.perf_counter()
+        if TOKEN_HASHING:
+            result = calculate_hashed_loss(oracle_tokens, postgres_tokens, threshold)
+        else:
+            result = calculate_loss(oracle_tokens, postgres_tokens, threshold)
+        timings["compare"] = time.perf_counter() - started
+        return result
 
     except Exception as e:
         logger.error(f"Validation exception: {e}", exc_info=True)
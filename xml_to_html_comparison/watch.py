@@ -0,0 +1,54 @@
+"""
+Change polling for `--watch`.
+
+The watcher keeps a high-water mark: the modification time up to which
+every document has been validated. Each poll covers the window from the
+mark (exclusive) to now minus WATCH_LAG (inclusive), so changes committed
+by transactions still in flight are picked up by a later poll. The mark is
+only moved once a window has been fully written to the report.
+"""
+
+import datetime
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger("validator")
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def watermark_path_for(csv_path):
+    """Returns the high-water mark file that belongs to a watch report."""
+    return f"{csv_path}.watermark.json"
+
+
+def load_watermark(path):
+    """Reads the high-water mark of an earlier watch, None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return datetime.datetime.strptime(json.load(f)["modified"], TIMESTAMP_FORMAT)
+
+
+def save_watermark(path, modified):
+    # Write-then-rename so a crash never leaves a half written mark.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"modified": modified.strftime(TIMESTAMP_FORMAT)}, f)
+    os.replace(tmp_path, path)
+
+
+def poll_windows(since, interval, lag, now=datetime.datetime.now, sleep=time.sleep):
+    """
+    Yields (since, until) modification windows, one per poll, forever. The
+    next window starts where the previous one ended.
+    """
+    lag = datetime.timedelta(seconds=lag)
+    while True:
+        until = now() - lag
+        if until > since:
+            yield since, until
+            since = until
+        sleep(interval)